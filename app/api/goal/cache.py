@@ -0,0 +1,143 @@
+import math
+import time
+from typing import Any, Callable, Protocol
+
+from app.cache import TTLCache
+from app.config import settings
+
+
+class FeedCacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    async def set(self, key: str, value: bytes) -> None:
+        ...
+
+    async def clear(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class MemoryFeedBackend:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache: TTLCache[str, bytes] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._cache.set(key, value)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+
+class RedisFeedBackend:
+    # all pages live in one hash so a single DEL drops the whole feed; the hash
+    # expires `ttl` seconds after its first page was written
+    def __init__(self, client: Any, ttl: float, namespace: str = "goal:public") -> None:
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+        self.namespace = namespace
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.hget(self.namespace, key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.namespace, key, value)
+            pipe.expire(self.namespace, self.ttl, nx=True)
+            await pipe.execute()
+
+    async def clear(self) -> None:
+        await self.client.delete(self.namespace)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class FeedCache:
+    def __init__(
+        self, backend: FeedCacheBackend | None, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.backend = backend
+        self.timer = timer
+        self.generation = 0
+        self.invalidated_at = -math.inf
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, key: str) -> bytes | None:
+        if not self.backend:
+            return None
+
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, generation: int) -> None:
+        # a write that raced with an invalidation would cache a stale page
+        if not self.backend or generation != self.generation:
+            return
+        await self.backend.set(key, value)
+
+    async def invalidate(self) -> None:
+        self.generation += 1
+        self.invalidated_at = self.timer()
+        self.invalidations += 1
+        if self.backend:
+            await self.backend.clear()
+
+    # a replica may still serve pages from before an invalidation this recent
+    def invalidated_within(self, seconds: float) -> bool:
+        return self.timer() - self.invalidated_at < seconds
+
+    async def close(self) -> None:
+        if self.backend:
+            await self.backend.close()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def public_goals_cache_key(limit: int, offset: int, after_id: int | None) -> str:
+    return f"{limit}:{offset}:{after_id}"
+
+
+def create_feed_backend() -> FeedCacheBackend | None:
+    if not settings.PUBLIC_GOALS_CACHE_ENABLED:
+        return None
+
+    if settings.PUBLIC_GOALS_CACHE_BACKEND == "redis":
+        from redis.asyncio import Redis
+
+        return RedisFeedBackend(
+            Redis.from_url(settings.PUBLIC_GOALS_CACHE_REDIS_URL),
+            ttl=settings.PUBLIC_GOALS_CACHE_TTL,
+        )
+    return MemoryFeedBackend(
+        maxsize=settings.PUBLIC_GOALS_CACHE_SIZE, ttl=settings.PUBLIC_GOALS_CACHE_TTL
+    )
+
+
+public_goals_cache = FeedCache(create_feed_backend())
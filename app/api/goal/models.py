@@ -1,10 +1,20 @@
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
 from fastapi import HTTPException, status
-
-from app.api.goal.utils import check_access_to_goal
-from app.database.db import AsyncSession
-from app.models import Goal, GoalSchema, Target, TargetSchema
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.api.goal.cache import public_goals_cache
+from app.api.goal.utils import (
+    check_access_to_goal,
+    check_if_match,
+    check_read_access_to_goal,
+    goal_etag,
+    precondition_failed,
+    validate_goal_batch,
+)
+from app.config import settings
+from app.database.db import AsyncSession, ReadOnlyAsyncSession
+from app.models import Goal, GoalSchema
 
 from .schemas import TargetRequest
 
@@ -25,60 +35,96 @@ class CreateGoal:
             goal = await Goal.add_goal(
                 session, title, description, private, user_id, targets  # type: ignore
             )
-            return GoalSchema.model_validate(goal)
+        if not private:
+            await public_goals_cache.invalidate()
+        return goal
 
 
-class ReadGoal:
+class CreateGoals:
     def __init__(self, session: AsyncSession) -> None:
         self.async_session = session
 
+    async def execute(self, items: list[Any], user_id: int) -> list[GoalSchema]:
+        if len(items) > settings.GOAL_BATCH_MAX_SIZE:
+            raise HTTPException(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch can't contain more than {settings.GOAL_BATCH_MAX_SIZE} goals",
+            )
+        goals = validate_goal_batch(items)
+
+        async with self.async_session.begin() as session:
+            created = await Goal.add_goals(session, user_id, [goal.model_dump() for goal in goals])
+        if any(not goal.private for goal in created):
+            await public_goals_cache.invalidate()
+        return created
+
+
+class ReadGoal:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
+        self.async_session = session
+
     async def execute(self, goal_id: int, user_id: int | None = None) -> GoalSchema:
         async with self.async_session() as session:
-            goal = await Goal.read_by_id(session, goal_id)
-            if not goal:
-                raise HTTPException(status.HTTP_404_NOT_FOUND)
+            goal = await Goal.read_view_by_id(session, goal_id)
+            check_read_access_to_goal(goal, user_id)
+            return GoalSchema.model_validate(goal._mapping)  # type: ignore
 
-            if goal.user_id != user_id and goal.private:
-                raise HTTPException(
-                    status.HTTP_403_FORBIDDEN,
-                    detail="You can't read goal that you haven't created",
-                )
-            return GoalSchema.model_validate(goal)
+
+class ReadGoalVersion:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
+        self.async_session = session
+
+    async def execute(self, goal_id: int, user_id: int | None = None) -> int:
+        async with self.async_session() as session:
+            goal = await Goal.read_access_by_id(session, goal_id)
+            check_read_access_to_goal(goal, user_id)
+            return goal.version  # type: ignore
 
 
 class ReadUserGoals:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
         self.async_session = session
 
-    async def execute(self, user_id: int, limit: int, offset: int) -> AsyncIterator[GoalSchema]:
+    async def execute(
+        self, user_id: int, limit: int, offset: int, after_id: int | None = None
+    ) -> AsyncIterator[GoalSchema]:
         async with self.async_session() as session:
-            async for goal in Goal.read_user_goals(session, user_id, limit, offset):
-                yield GoalSchema.model_validate(goal)
+            async for goal in Goal.read_user_goal_views(session, user_id, limit, offset, after_id):
+                yield GoalSchema.model_validate(goal._mapping)
 
 
-class ReadPublicGoals:
-    def __init__(self, session: AsyncSession) -> None:
+class ReadUserGoalVersions:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
         self.async_session = session
 
-    async def execute(self, limit: int, offset: int) -> AsyncIterator[GoalSchema]:
+    async def execute(
+        self, user_id: int, limit: int, offset: int, after_id: int | None = None
+    ) -> list[tuple[int, int]]:
         async with self.async_session() as session:
-            async for goal in Goal.read_public_goals(session, limit, offset):
-                yield GoalSchema.model_validate(goal)
+            rows = await Goal.read_user_goal_versions(session, user_id, limit, offset, after_id)
+            return [(row.id, row.version) for row in rows]
 
 
-class AddTargetToGoal:
-    def __init__(self, session: AsyncSession) -> None:
+class ReadPublicGoals:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
         self.async_session = session
 
     async def execute(
-        self, title: str, target: int, goal_id: int, user_id: int, progress: int
-    ) -> TargetSchema:
-        async with self.async_session.begin() as session:
-            goal_instance = await Goal.read_by_id(session, goal_id)
-            check_access_to_goal(goal_instance, user_id)
+        self, limit: int, offset: int, after_id: int | None = None
+    ) -> AsyncIterator[GoalSchema]:
+        async with self.async_session() as session:
+            async for goal in Goal.read_public_goal_views(session, limit, offset, after_id):
+                yield GoalSchema.model_validate(goal._mapping)
 
-            target_instance = await Target.add(session, title, target, goal_id, progress)
-            return TargetSchema.model_validate(target_instance)
+
+class ExportUserGoals:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
+        self.async_session = session
+
+    async def execute(self, user_id: int) -> AsyncIterator[GoalSchema]:
+        async with self.async_session() as session:
+            async for goal in Goal.export_user_goals(session, user_id):
+                yield goal
 
 
 class DeleteGoal:
@@ -86,10 +132,16 @@ class DeleteGoal:
         self.async_session = session
 
     async def execute(self, id: int, user_id: int) -> None:
-        async with self.async_session.begin() as session:
-            goal = await Goal.read_by_id(session, id)
-            check_access_to_goal(goal, user_id)
-            await Goal.delete(session, goal)  # type: ignore
+        try:
+            async with self.async_session.begin() as session:
+                goal = await Goal.read_by_id(session, id)
+                check_access_to_goal(goal, user_id)
+                public = not goal.private  # type: ignore
+                await Goal.delete(session, goal)  # type: ignore
+        except StaleDataError:
+            raise precondition_failed()
+        if public:
+            await public_goals_cache.invalidate()
 
 
 class UpdateGoal:
@@ -103,52 +155,20 @@ class UpdateGoal:
         description: str,
         private: bool,
         user_id: int,
+        if_match: str | None = None,
     ) -> GoalSchema:
-        async with self.async_session.begin() as session:
-            goal = await Goal.read_by_id(session, id)
-            check_access_to_goal(goal, user_id)
-
-            await goal.update(session, title, description, private)  # type: ignore
-            await session.refresh(goal)
-            return GoalSchema.model_validate(goal)
-
-
-class UpdateTarget:
-    def __init__(self, session: AsyncSession) -> None:
-        self.async_session = session
-
-    async def execute(
-        self,
-        goal_id: int,
-        target_id: int,
-        title: str,
-        target: int,
-        user_id: int,
-        progress: int,
-    ) -> TargetSchema:
-        async with self.async_session.begin() as session:
-            goal_instance = await Goal.read_by_id(session, goal_id)
-            check_access_to_goal(goal_instance, user_id)
-
-            target_instance = await Target.read_by_id(session, target_id)
-            if not target_instance or target_instance.goal_id != goal_id:
-                raise HTTPException(status.HTTP_404_NOT_FOUND)
-
-            await target_instance.update(session, title, target, progress)
-            await session.refresh(target_instance)
-            return TargetSchema.model_validate(target_instance)
-
-
-class DeleteTarget:
-    def __init__(self, session: AsyncSession) -> None:
-        self.async_session = session
-
-    async def execute(self, goal_id: int, target_id: int, user_id: int) -> None:
-        async with self.async_session.begin() as session:
-            goal_instance = await Goal.read_by_id(session, goal_id)
-            check_access_to_goal(goal_instance, user_id)
-
-            target_instance = await Target.read_by_id(session, target_id)
-            if not target_instance:
-                return
-            await Target.delete(session, target_instance)
+        try:
+            async with self.async_session.begin() as session:
+                goal = await Goal.read_by_id(session, id)
+                check_access_to_goal(goal, user_id)
+                check_if_match(if_match, goal_etag(id, goal.version))  # type: ignore
+                public = not goal.private or not private  # type: ignore
+
+                await goal.update(session, title, description, private)  # type: ignore
+                await session.refresh(goal)
+                result = GoalSchema.model_validate(goal)
+        except StaleDataError:
+            raise precondition_failed()
+        if public:
+            await public_goals_cache.invalidate()
+        return result
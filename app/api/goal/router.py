@@ -1,28 +1,54 @@
-from typing import Annotated
+from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Body, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.api.user.jwt import (
     get_current_user_from_token,
     optional_get_current_user_from_token,
 )
-from app.models.schema import GoalSchema, UserSchema
+from app.config import settings
+from app.database.db import reads_from_primary
+from app.models.schema import PrincipalSchema
 
+from .cache import public_goals_cache, public_goals_cache_key
 from .models import (
     CreateGoal,
+    CreateGoals,
     DeleteGoal,
+    ExportUserGoals,
     ReadGoal,
+    ReadGoalVersion,
     ReadPublicGoals,
     ReadUserGoals,
+    ReadUserGoalVersions,
     UpdateGoal,
 )
 from .schemas import (
-    AllGoalsSchemaResponse,
+    BATCH_OPENAPI_EXTRA,
     AllGoalsWithTargetResponse,
+    BatchGoalResponse,
     GoalRequest,
     GoalWithTargetRequest,
     GoalWithTargetResponse,
 )
+from .utils import (
+    NDJSON_MEDIA_TYPE,
+    check_page_limit,
+    decode_cursor,
+    etag_matches,
+    export_goals_to_csv,
+    export_goals_to_ndjson,
+    get_next_cursor,
+    goal_etag,
+    goal_response,
+    goals_page_body,
+    goals_page_etag,
+    goals_page_response,
+    goals_to_ndjson,
+    not_modified_response,
+    wants_ndjson,
+)
 
 router = APIRouter(prefix="/goal", tags=["goal"])
 
@@ -30,63 +56,151 @@ router = APIRouter(prefix="/goal", tags=["goal"])
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=GoalWithTargetResponse)
 async def add_goal(
     data: GoalWithTargetRequest,
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
     use_case: CreateGoal = Depends(CreateGoal),
-) -> GoalSchema:
-    return await use_case.execute(
+) -> Response:
+    goal = await use_case.execute(
         data.title, data.description, data.private, data.targets, current_user.id
     )
+    return goal_response(goal, status.HTTP_201_CREATED)
+
+
+# all or nothing: an invalid item rejects the batch with a 422 listing the invalid indexes
+@router.post(
+    "/batch",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BatchGoalResponse,
+    # the body is validated item by item in the use case, document the items it expects
+    openapi_extra=BATCH_OPENAPI_EXTRA,
+)
+async def add_goals(
+    data: Annotated[list[Any], Body()],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
+    use_case: CreateGoals = Depends(CreateGoals),
+) -> dict:
+    goals = await use_case.execute(data, current_user.id)
+    return {"results": [{"index": index, "goal": goal} for index, goal in enumerate(goals)]}
 
 
 @router.get("", response_model=AllGoalsWithTargetResponse)
 async def get_user_goals(
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
     offset: int = 0,
-    limit: Annotated[int, Query(le=100)] = 10,
+    limit: Annotated[int, Query(le=settings.GOAL_STREAM_MAX_LIMIT)] = 10,
+    cursor: str | None = None,
+    accept: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
     use_case: ReadUserGoals = Depends(ReadUserGoals),
-) -> AllGoalsSchemaResponse:
-    return AllGoalsSchemaResponse(
-        goals=[goal async for goal in use_case.execute(current_user.id, limit, offset)]
-    )
+    versions_use_case: ReadUserGoalVersions = Depends(ReadUserGoalVersions),
+) -> Response:
+    after_id = decode_cursor(cursor) if cursor else None
+    if wants_ndjson(accept):
+        return StreamingResponse(
+            goals_to_ndjson(use_case.execute(current_user.id, limit, offset, after_id), limit),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    check_page_limit(limit)
+    if if_none_match:
+        versions = await versions_use_case.execute(current_user.id, limit, offset, after_id)
+        etag = goals_page_etag(versions, limit)
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+
+    goals = [goal async for goal in use_case.execute(current_user.id, limit, offset, after_id)]
+    response = goals_page_response(goals, get_next_cursor(goals, limit))
+    response.headers["ETag"] = goals_page_etag(((goal.id, goal.version) for goal in goals), limit)
+    return response
 
 
 @router.get("/public", response_model=AllGoalsWithTargetResponse)
 async def get_public_goals(
+    request: Request,
     offset: int = 0,
-    limit: Annotated[int, Query(le=100)] = 10,
+    limit: Annotated[int, Query(le=settings.GOAL_STREAM_MAX_LIMIT)] = 10,
+    cursor: str | None = None,
+    accept: Annotated[str | None, Header()] = None,
     use_case: ReadPublicGoals = Depends(ReadPublicGoals),
-) -> AllGoalsSchemaResponse:
-    return AllGoalsSchemaResponse(goals=[goal async for goal in use_case.execute(limit, offset)])
+) -> Response:
+    after_id = decode_cursor(cursor) if cursor else None
+    if wants_ndjson(accept):
+        return StreamingResponse(
+            goals_to_ndjson(use_case.execute(limit, offset, after_id), limit),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    check_page_limit(limit)
+    key = public_goals_cache_key(limit, offset, after_id)
+    # a client that has just written reads past the cache, straight from the primary
+    body = None if reads_from_primary(request) else await public_goals_cache.get(key)
+    if body is None:
+        generation = public_goals_cache.generation
+        goals = [goal async for goal in use_case.execute(limit, offset, after_id)]
+        body = goals_page_body(goals, get_next_cursor(goals, limit))
+        # a lagging replica could still return the page from before the latest write
+        if not use_case.async_session.from_replica or not public_goals_cache.invalidated_within(
+            settings.DB_REPLICA_STICKY_SECONDS
+        ):
+            await public_goals_cache.set(key, body, generation)
+    return Response(body, media_type="application/json")
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_user_goals(
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    use_case: ExportUserGoals = Depends(ExportUserGoals),
+) -> StreamingResponse:
+    goals = use_case.execute(current_user.id)
+    if export_format == "csv":
+        return StreamingResponse(
+            export_goals_to_csv(goals),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="goals.csv"'},
+        )
+    return StreamingResponse(
+        export_goals_to_ndjson(goals),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="goals.ndjson"'},
+    )
 
 
 @router.get("/{goal_id}", response_model=GoalWithTargetResponse)
 async def get_goal_by_id(
     goal_id: int,
-    current_user: Annotated[UserSchema, Depends(optional_get_current_user_from_token)],
+    current_user: Annotated[PrincipalSchema, Depends(optional_get_current_user_from_token)],
+    if_none_match: Annotated[str | None, Header()] = None,
     use_case: ReadGoal = Depends(ReadGoal),
-) -> GoalSchema:
-    if current_user:
-        return await use_case.execute(goal_id, current_user.id)
-    else:
-        return await use_case.execute(goal_id)
+    version_use_case: ReadGoalVersion = Depends(ReadGoalVersion),
+) -> Response:
+    user_id = current_user.id if current_user else None
+    if if_none_match:
+        etag = goal_etag(goal_id, await version_use_case.execute(goal_id, user_id))
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+
+    goal = await use_case.execute(goal_id, user_id)
+    return goal_response(goal)
 
 
 @router.put("/{goal_id}", response_model=GoalWithTargetResponse)
 async def update_goal(
     data: GoalRequest,
     goal_id: int,
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
+    if_match: Annotated[str | None, Header()] = None,
     use_case: UpdateGoal = Depends(UpdateGoal),
-) -> GoalSchema:
-    return await use_case.execute(
-        goal_id, data.title, data.description, data.private, current_user.id
+) -> Response:
+    goal = await use_case.execute(
+        goal_id, data.title, data.description, data.private, current_user.id, if_match
     )
+    return goal_response(goal)
 
 
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_goal(
     goal_id: int,
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
     use_case: DeleteGoal = Depends(DeleteGoal),
 ) -> None:
     return await use_case.execute(goal_id, current_user.id)
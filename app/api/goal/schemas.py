@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from app.api.target.schemas import TargetRequest, TargetResponse
 from app.models import GoalSchema
@@ -29,7 +29,50 @@ class GoalWithTargetResponse(GoalResponse):
 
 class AllGoalsWithTargetResponse(BaseModel):
     goals: list[GoalWithTargetResponse]
+    next_cursor: str | None = None
 
 
 class AllGoalsSchemaResponse(BaseModel):
     goals: list[GoalSchema]
+    next_cursor: str | None = None
+
+
+# GoalSchema fields that GoalWithTargetResponse doesn't expose
+GOAL_RESPONSE_EXCLUDE: dict = {
+    "created_at": True,
+    "version": True,
+    "targets": {"__all__": {"goal_id", "version"}},
+}
+
+# exports keep created_at but, like responses, leave out the internal versions
+GOAL_EXPORT_EXCLUDE: dict = {
+    "version": True,
+    "targets": {"__all__": {"goal_id", "version"}},
+}
+
+goal_request_adapter = TypeAdapter(GoalWithTargetRequest)
+goal_adapter = TypeAdapter(GoalSchema)
+goals_page_adapter = TypeAdapter(AllGoalsSchemaResponse)
+
+
+BATCH_OPENAPI_EXTRA: dict = {
+    "requestBody": {
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "array",
+                    "items": {"$ref": "#/components/schemas/GoalWithTargetRequest"},
+                }
+            }
+        }
+    }
+}
+
+
+class BatchGoalResult(BaseModel):
+    index: int
+    goal: GoalWithTargetResponse
+
+
+class BatchGoalResponse(BaseModel):
+    results: list[BatchGoalResult]
@@ -1,9 +1,44 @@
-from fastapi import HTTPException, status
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import json
+from typing import Any, AsyncIterator, Iterable
+
+from fastapi import HTTPException, Response, status
+from pydantic import ValidationError
+from sqlalchemy import Row
 
 from app.models.goal import Goal
+from app.models.schema import GoalSchema
+
+from .schemas import (
+    GOAL_EXPORT_EXCLUDE,
+    GOAL_RESPONSE_EXCLUDE,
+    AllGoalsSchemaResponse,
+    GoalWithTargetRequest,
+    goal_adapter,
+    goal_request_adapter,
+    goals_page_adapter,
+)
 
+GOAL_PAGE_MAX_LIMIT = 100
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_EXPORT_COLUMNS = [
+    "goal_id",
+    "goal_title",
+    "goal_description",
+    "goal_private",
+    "goal_created_at",
+    "target_id",
+    "target_title",
+    "target_target",
+    "target_progress",
+]
 
-def check_access_to_goal(goal_instance: Goal | None, user_id: int) -> None:
+
+def check_access_to_goal(goal_instance: Goal | Row | None, user_id: int) -> None:
     if not goal_instance:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
@@ -12,3 +47,178 @@ def check_access_to_goal(goal_instance: Goal | None, user_id: int) -> None:
             status.HTTP_403_FORBIDDEN,
             detail="You can't modify goals that you haven't created",
         )
+
+
+def check_read_access_to_goal(goal: Goal | Row | None, user_id: int | None) -> None:
+    if not goal:
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    if goal.user_id != user_id and goal.private:
+        raise HTTPException(
+            status.HTTP_403_FORBIDDEN,
+            detail="You can't read goal that you haven't created",
+        )
+
+
+def encode_cursor(goal_id: int) -> str:
+    return base64.urlsafe_b64encode(str(goal_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def get_next_cursor(goals: list[GoalSchema], limit: int) -> str | None:
+    if not goals or len(goals) < limit:
+        return None
+    return encode_cursor(goals[-1].id)
+
+
+def check_page_limit(limit: int) -> None:
+    if limit > GOAL_PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"limit can't be greater than {GOAL_PAGE_MAX_LIMIT}",
+        )
+
+
+# items are validated one by one so the error says which of them is invalid; the batch is
+# written all or nothing, so any invalid item rejects it
+def validate_goal_batch(items: list[Any]) -> list[GoalWithTargetRequest]:
+    goals = []
+    errors: list[dict] = []
+    for index, item in enumerate(items):
+        try:
+            goals.append(goal_request_adapter.validate_python(item))
+        except ValidationError as e:
+            errors.append(
+                {"index": index, "errors": e.errors(include_url=False, include_context=False)}
+            )
+        except HTTPException as e:
+            errors.append({"index": index, "errors": [{"msg": e.detail}]})
+    if errors:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors)
+    return goals
+
+
+def wants_ndjson(accept: str | None) -> bool:
+    return accept is not None and NDJSON_MEDIA_TYPE in accept
+
+
+def goal_etag(goal_id: int, version: int) -> str:
+    return f'"{goal_id}.{version}"'
+
+
+def target_etag(target_id: int, version: int) -> str:
+    return f'"{target_id}.{version}"'
+
+
+def goals_page_etag(versions: Iterable[tuple[int, int]], limit: int) -> str:
+    # limit is part of the tag because it decides whether the page has a next_cursor
+    digest = hashlib.blake2b(str(limit).encode(), digest_size=16)
+    for goal_id, version in versions:
+        digest.update(f";{goal_id}.{version}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status.HTTP_412_PRECONDITION_FAILED, detail="Resource was modified by another request"
+    )
+
+
+def check_if_match(if_match: str | None, etag: str) -> None:
+    # If-Match uses the strong comparison, so weak tags never match
+    if not if_match or if_match.strip() == "*":
+        return
+    if etag not in (tag.strip() for tag in if_match.split(",")):
+        raise precondition_failed()
+
+
+def if_match_versions(if_match: str | None, resource_id: int) -> list[int] | None:
+    # versions a conditional write may apply to; None means unconditional
+    if not if_match or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag_id, _, version = tag.strip().strip('"').partition(".")
+        if tag.strip().startswith('"') and tag_id == str(resource_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def goal_response(goal: GoalSchema, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(
+        goal_adapter.dump_json(goal, exclude=GOAL_RESPONSE_EXCLUDE),
+        status_code=status_code,
+        media_type="application/json",
+        headers={"ETag": goal_etag(goal.id, goal.version)},
+    )
+
+
+def goals_page_body(goals: list[GoalSchema], next_cursor: str | None) -> bytes:
+    # goals are validated already, so skip both the wrapper validation and response_model
+    page = AllGoalsSchemaResponse.model_construct(goals=goals, next_cursor=next_cursor)
+    return goals_page_adapter.dump_json(page, exclude={"goals": {"__all__": GOAL_RESPONSE_EXCLUDE}})
+
+
+def goals_page_response(goals: list[GoalSchema], next_cursor: str | None) -> Response:
+    return Response(goals_page_body(goals, next_cursor), media_type="application/json")
+
+
+# headers are sent before the first goal, so a full page ends with a {"next_cursor": ...} line
+async def goals_to_ndjson(goals: AsyncIterator[GoalSchema], limit: int) -> AsyncIterator[bytes]:
+    count = 0
+    last_id = None
+    async for goal in goals:
+        count += 1
+        last_id = goal.id
+        yield goal_adapter.dump_json(goal, exclude=GOAL_RESPONSE_EXCLUDE) + b"\n"
+    if last_id is not None and count >= limit:
+        yield json.dumps({"next_cursor": encode_cursor(last_id)}).encode() + b"\n"
+
+
+async def export_goals_to_ndjson(goals: AsyncIterator[GoalSchema]) -> AsyncIterator[bytes]:
+    async for goal in goals:
+        yield goal_adapter.dump_json(goal, exclude=GOAL_EXPORT_EXCLUDE) + b"\n"
+
+
+async def export_goals_to_csv(goals: AsyncIterator[GoalSchema]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_EXPORT_COLUMNS)
+    async for goal in goals:
+        goal_columns = [
+            goal.id,
+            goal.title,
+            goal.description,
+            goal.private,
+            goal.created_at.isoformat(),
+        ]
+        if not goal.targets:
+            writer.writerow(goal_columns + [None] * 4)
+        for target in goal.targets:
+            writer.writerow(
+                goal_columns + [target.id, target.title, target.target, target.progress]
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from .goal.router import router as goal_router
+from .metrics.router import router as metrics_router
 from .target.router import router as target_router
 from .user.router import router as user_router
 
@@ -9,3 +10,4 @@ router = APIRouter()
 router.include_router(user_router)
 router.include_router(goal_router)
 router.include_router(target_router)
+router.include_router(metrics_router)
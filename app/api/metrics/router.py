@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+
+from app.api.goal.cache import public_goals_cache
+from app.api.target.buffer import progress_buffer
+from app.api.user.cache import user_cache
+from app.api.user.security import password_hasher
+from app.database.db import pool_stats, replica_router
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def get_metrics() -> dict:
+    return {
+        "user_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "progress_buffer": progress_buffer.stats(),
+        "public_goals_cache": public_goals_cache.stats(),
+        "database_pool": pool_stats(),
+        "database_replicas": replica_router.stats(),
+    }
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.goal.cache import public_goals_cache
+from app.config import settings
+from app.database.db import AsyncSessionLocal
+from app.models import Target
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressBuffer:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        flush_interval: float,
+        max_entries: int,
+        chunk_size: int = 1000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        # every delta takes three bind parameters and asyncpg allows 32767 per statement,
+        # so a backlog piled up during an outage is written in several transactions
+        self.chunk_size = chunk_size
+        self.flushes = 0
+        self.failures = 0
+        self.flushed_rows = 0
+        self.dropped_rows = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self._deltas: dict[tuple[int, int], int] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+        # at most one early flush at a time; while it runs or fails, adds just keep buffering
+        self._flush_task: asyncio.Task | None = None
+
+    def add(self, target_id: int, user_id: int, delta: int) -> None:
+        key = (target_id, user_id)
+        self._deltas[key] = self._deltas.get(key, 0) + delta
+        if len(self._deltas) >= self.max_entries and not self.flush_pending():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def flush_pending(self) -> bool:
+        return self._flush_task is not None and not self._flush_task.done()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            items = list(self._deltas.items())
+            self._deltas = {}
+            for offset in range(0, len(items), self.chunk_size):
+                try:
+                    written = await self._flush_chunk(items[offset : offset + self.chunk_size])
+                except asyncio.CancelledError:
+                    self._restore(items[offset:])
+                    raise
+                if not written:
+                    self._restore(items[offset:])
+                    return
+
+    async def _flush_chunk(self, items: list[tuple[tuple[int, int], int]]) -> bool:
+        start = time.perf_counter()
+        try:
+            async with self.session_factory.begin() as session:
+                updated = await Target.increment_progress_many(
+                    session,
+                    [(target_id, user_id, delta) for (target_id, user_id), delta in items],
+                )
+        except Exception:
+            logger.exception("Failed to flush %s progress updates", len(items))
+            self.failures += 1
+            return False
+
+        elapsed = time.perf_counter() - start
+        if any(not row.private for row in updated):
+            await public_goals_cache.invalidate()
+        self.flushes += 1
+        self.flushed_rows += len(updated)
+        self.dropped_rows += len(items) - len(updated)
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        return True
+
+    def _restore(self, items: list[tuple[tuple[int, int], int]]) -> None:
+        # deltas that were not written go back, merged with any added in the meantime
+        for key, delta in items:
+            self._deltas[key] = self._deltas.get(key, 0) + delta
+
+    def start(self) -> None:
+        if not self._task:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # the loop is asked to stop rather than cancelled, so a flush in progress completes
+        if self._task:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        if self._flush_task:
+            # a failed or cancelled early flush left its deltas in the buffer for the final one
+            await asyncio.wait([self._flush_task])
+            self._flush_task = None
+        await self.flush()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "size": len(self._deltas),
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "flushed_rows": self.flushed_rows,
+            "dropped_rows": self.dropped_rows,
+            "last_flush_ms": self.last_flush_seconds * 1000,
+            "max_flush_ms": self.max_flush_seconds * 1000,
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+
+progress_buffer = ProgressBuffer(
+    AsyncSessionLocal,
+    flush_interval=settings.PROGRESS_BUFFER_FLUSH_MS / 1000,
+    max_entries=settings.PROGRESS_BUFFER_MAX_ENTRIES,
+)
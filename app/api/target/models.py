@@ -1,9 +1,14 @@
 from fastapi import HTTPException, status
 
-from app.api.goal.utils import check_access_to_goal
+from app.api.goal.cache import public_goals_cache
+from app.api.goal.utils import check_access_to_goal, if_match_versions
+from app.config import settings
 from app.database.db import AsyncSession
 from app.models import Goal, Target, TargetSchema
 
+from .buffer import progress_buffer
+from .utils import target_not_changed
+
 
 class AddTarget:
     def __init__(self, session: AsyncSession) -> None:
@@ -13,11 +18,15 @@ class AddTarget:
         self, title: str, target: int, goal_id: int, user_id: int, progress: int
     ) -> TargetSchema:
         async with self.async_session.begin() as session:
-            goal_instance = await Goal.read_by_id(session, goal_id)
+            goal_instance = await Goal.read_access_by_id(session, goal_id)
             check_access_to_goal(goal_instance, user_id)
+            public = not goal_instance.private  # type: ignore
 
             target_instance = await Target.add(session, title, target, goal_id, progress)
-            return TargetSchema.model_validate(target_instance)
+            result = TargetSchema.model_validate(target_instance)
+        if public:
+            await public_goals_cache.invalidate()
+        return result
 
 
 class UpdateTarget:
@@ -32,18 +41,18 @@ class UpdateTarget:
         target: int,
         user_id: int,
         progress: int,
+        if_match: str | None = None,
     ) -> TargetSchema:
+        versions = if_match_versions(if_match, target_id)
         async with self.async_session.begin() as session:
-            goal_instance = await Goal.read_by_id(session, goal_id)
-            check_access_to_goal(goal_instance, user_id)
-
-            target_instance = await Target.read_by_id(session, target_id)
-            if not target_instance or target_instance.goal_id != goal_id:
-                raise HTTPException(status.HTTP_404_NOT_FOUND)
-
-            await target_instance.update(session, title, target, progress)
-            await session.refresh(target_instance)
-            return TargetSchema.model_validate(target_instance)
+            row = await Target.update_owned(
+                session, target_id, goal_id, user_id, title, target, progress, versions
+            )
+            if not row:
+                raise await target_not_changed(session, goal_id, target_id, user_id)
+        if not row.private:
+            await public_goals_cache.invalidate()
+        return TargetSchema.model_validate(row._mapping)
 
 
 class DeleteTarget:
@@ -52,10 +61,67 @@ class DeleteTarget:
 
     async def execute(self, goal_id: int, target_id: int, user_id: int) -> None:
         async with self.async_session.begin() as session:
-            goal_instance = await Goal.read_by_id(session, goal_id)
-            check_access_to_goal(goal_instance, user_id)
+            row = await Target.delete_owned(session, target_id, goal_id, user_id)
+            if not row:
+                raise await target_not_changed(session, goal_id, target_id, user_id)
+        if not row.private:
+            await public_goals_cache.invalidate()
+
+
+class UpdateTargetsProgress:
+    def __init__(self, session: AsyncSession) -> None:
+        self.async_session = session
+
+    async def execute(self, progress: dict[int, int], user_id: int) -> list[TargetSchema]:
+        if len(progress) > settings.TARGET_PROGRESS_BATCH_MAX_SIZE:
+            raise HTTPException(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=(
+                    f"Batch can't contain more than {settings.TARGET_PROGRESS_BATCH_MAX_SIZE} "
+                    "targets"
+                ),
+            )
+        if not progress:
+            return []
 
-            target_instance = await Target.read_by_id(session, target_id)
-            if not target_instance:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-            await Target.delete(session, target_instance)
+        async with self.async_session.begin() as session:
+            rows = await Target.update_progress_many(session, user_id, progress)
+        if any(not row.private for row in rows):
+            await public_goals_cache.invalidate()
+        return [TargetSchema.model_validate(row._mapping) for row in rows]
+
+
+class IncrementTargetProgress:
+    def __init__(self, session: AsyncSession) -> None:
+        self.async_session = session
+
+    async def execute(
+        self, target_id: int, user_id: int, delta: int, clamp: bool
+    ) -> TargetSchema | None:
+        if settings.PROGRESS_BUFFER_ENABLED:
+            # buffered deltas are summed and always clamped when written, long after the 202
+            if not clamp:
+                raise HTTPException(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="clamp=false is not supported while progress increments are buffered",
+                )
+            progress_buffer.add(target_id, user_id, delta)
+            return None
+
+        async with self.async_session.begin() as session:
+            row = await Target.increment_progress(session, target_id, user_id, delta, clamp)
+            if not row:
+                owner_id = await Target.read_owner_id(session, target_id)
+                if owner_id is None:
+                    raise HTTPException(status.HTTP_404_NOT_FOUND)
+                if owner_id != user_id:
+                    raise HTTPException(
+                        status.HTTP_403_FORBIDDEN,
+                        detail="You can't modify goals that you haven't created",
+                    )
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST, detail="Progress can not be greater than target"
+                )
+        if not row.private:
+            await public_goals_cache.invalidate()
+        return TargetSchema.model_validate(row._mapping)
@@ -1,12 +1,25 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Response, status
 
+from app.api.goal.utils import target_etag
 from app.api.user.jwt import get_current_user_from_token
-from app.models.schema import UserSchema
+from app.models.schema import PrincipalSchema
 
-from .models import AddTarget, DeleteTarget, UpdateTarget
-from .schemas import TargetRequest, TargetResponse
+from .models import (
+    AddTarget,
+    DeleteTarget,
+    IncrementTargetProgress,
+    UpdateTarget,
+    UpdateTargetsProgress,
+)
+from .schemas import (
+    TargetIncrementRequest,
+    TargetProgressRequest,
+    TargetProgressResponse,
+    TargetRequest,
+    TargetResponse,
+)
 
 router = APIRouter(prefix="/target", tags=["target"])
 
@@ -15,28 +28,72 @@ router = APIRouter(prefix="/target", tags=["target"])
 async def add_target_to_goal(
     goal_id: int,
     data: TargetRequest,
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    response: Response,
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
     use_case: AddTarget = Depends(AddTarget),
 ) -> TargetResponse:
     target = await use_case.execute(
         data.title, data.target, goal_id, current_user.id, data.progress
     )
+    response.headers["ETag"] = target_etag(target.id, target.version)
     return TargetResponse(
         title=target.title, target=target.target, id=target.id, progress=target.progress
     )
 
 
+@router.patch("/progress", response_model=TargetProgressResponse)
+async def update_targets_progress(
+    data: list[TargetProgressRequest],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
+    use_case: UpdateTargetsProgress = Depends(UpdateTargetsProgress),
+) -> TargetProgressResponse:
+    progress = {item.id: item.progress for item in data}
+    targets = await use_case.execute(progress, current_user.id)
+    updated = {target.id for target in targets}
+    return TargetProgressResponse(
+        targets=[
+            TargetResponse(
+                title=target.title, target=target.target, id=target.id, progress=target.progress
+            )
+            for target in targets
+        ],
+        not_updated=[target_id for target_id in progress if target_id not in updated],
+    )
+
+
 @router.put("/{target_id}", response_model=TargetResponse)
 async def update_target(
     goal_id: int,
     target_id: int,
     data: TargetRequest,
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    response: Response,
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
+    if_match: Annotated[str | None, Header()] = None,
     use_case: UpdateTarget = Depends(UpdateTarget),
 ) -> TargetResponse:
     target = await use_case.execute(
-        goal_id, target_id, data.title, data.target, current_user.id, data.progress
+        goal_id, target_id, data.title, data.target, current_user.id, data.progress, if_match
     )
+    response.headers["ETag"] = target_etag(target.id, target.version)
+    return TargetResponse(
+        title=target.title, target=target.target, id=target.id, progress=target.progress
+    )
+
+
+@router.post(
+    "/{target_id}/increment",
+    response_model=TargetResponse,
+    responses={status.HTTP_202_ACCEPTED: {"description": "Increment buffered"}},
+)
+async def increment_target_progress(
+    target_id: int,
+    data: TargetIncrementRequest,
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
+    use_case: IncrementTargetProgress = Depends(IncrementTargetProgress),
+) -> TargetResponse | Response:
+    target = await use_case.execute(target_id, current_user.id, data.delta, data.clamp)
+    if not target:
+        return Response(status_code=status.HTTP_202_ACCEPTED)
     return TargetResponse(
         title=target.title, target=target.target, id=target.id, progress=target.progress
     )
@@ -46,7 +103,7 @@ async def update_target(
 async def delete_target(
     goal_id: int,
     target_id: int,
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
     use_case: DeleteTarget = Depends(DeleteTarget),
 ) -> None:
     return await use_case.execute(goal_id, target_id, current_user.id)
@@ -24,3 +24,18 @@ class TargetRequest(Target):
 
 class TargetResponse(Target):
     id: int
+
+
+class TargetProgressRequest(BaseModel):
+    id: int
+    progress: int
+
+
+class TargetProgressResponse(BaseModel):
+    targets: list[TargetResponse]
+    not_updated: list[int]
+
+
+class TargetIncrementRequest(BaseModel):
+    delta: int
+    clamp: bool = True
@@ -0,0 +1,16 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.goal.utils import check_access_to_goal, precondition_failed
+from app.models import Goal, Target
+
+
+async def target_not_changed(
+    session: AsyncSession, goal_id: int, target_id: int, user_id: int
+) -> HTTPException:
+    # only runs after a single-statement mutation matched no rows, to tell the caller why
+    goal = await Goal.read_access_by_id(session, goal_id)
+    check_access_to_goal(goal, user_id)
+    if await Target.read_version_by_id(session, target_id, goal_id) is None:
+        return HTTPException(status.HTTP_404_NOT_FOUND)
+    return precondition_failed()
@@ -0,0 +1,7 @@
+from app.cache import TTLCache
+from app.config import settings
+from app.models import UserSchema
+
+user_cache: TTLCache[str, UserSchema] = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL
+)
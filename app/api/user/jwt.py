@@ -4,63 +4,76 @@ from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
 
 from app.config import settings
-from app.models.schema import UserSchema
+from app.models.schema import PrincipalSchema
 
 from .models import ReadUserByUsername
+from .revocation import token_revocations
 from .security import OAuth2PasswordBearerWithCookie
 
 oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="/user/token")
 optional_oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="/user/token", auto_error=False)
 
 
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+    )
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now, "ep": settings.JWT_EPOCH})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        raise credentials_exception()
+    if payload.get("sub") is None:
+        raise credentials_exception()
+    return payload
+
+
+async def principal_from_payload(payload: dict) -> PrincipalSchema | None:
+    if not settings.JWT_STATELESS or "uid" not in payload or "email" not in payload:
+        return None
+
+    if payload.get("ep") != settings.JWT_EPOCH:
+        raise credentials_exception()
+    if await token_revocations.is_revoked(payload["uid"]):
+        raise credentials_exception()
+    return PrincipalSchema(id=payload["uid"], email=payload["email"], username=payload["sub"])
+
+
+async def read_principal(token: str, use_case: ReadUserByUsername) -> PrincipalSchema:
+    payload = decode_access_token(token)
+    principal = await principal_from_payload(payload)
+    if principal:
+        return principal
+
+    user = await use_case.execute(payload["sub"])
+    if user is None:
+        raise credentials_exception()
+    return PrincipalSchema.model_validate(user)
+
+
 async def optional_get_current_user_from_token(
     token: str = Depends(optional_oauth2_scheme),
     use_case: ReadUserByUsername = Depends(ReadUserByUsername),
-) -> UserSchema | None:
+) -> PrincipalSchema | None:
     if not token:
         return None
-
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-    )
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = await use_case.execute(username)
-    if user is None:
-        raise credentials_exception
-    return user
+    return await read_principal(token, use_case)
 
 
 async def get_current_user_from_token(
     token: str = Depends(oauth2_scheme),
     use_case: ReadUserByUsername = Depends(ReadUserByUsername),
-) -> UserSchema:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-    )
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = await use_case.execute(username)
-    if user is None:
-        raise credentials_exception
-    return user
+) -> PrincipalSchema:
+    return await read_principal(token, use_case)
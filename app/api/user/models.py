@@ -1,13 +1,19 @@
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 
-from app.database.db import AsyncSession
+from app.api.goal.cache import public_goals_cache
+from app.config import settings
+from app.database.db import AsyncSession, ReadOnlyAsyncSession
 from app.models import User, UserSchema
 
-from .security import get_password_hash, verify_password
+from .cache import user_cache
+from .revocation import token_revocations
+from .security import password_hasher
+from .utils import check_user_is_unique
 
 
 class ReadUserById:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
         self.async_session = session
 
     async def execute(self, user_id: int) -> UserSchema:
@@ -19,15 +25,26 @@ class ReadUserById:
 
 
 class ReadUserByUsername:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: ReadOnlyAsyncSession) -> None:
         self.async_session = session
 
     async def execute(self, username: str) -> UserSchema:
+        cached = user_cache.get(username)
+        if cached:
+            return cached
+
+        generation = user_cache.generation
         async with self.async_session() as session:
             user = await User.read_by_username(session, username)
             if not user:
                 raise HTTPException(status.HTTP_404_NOT_FOUND)
-            return UserSchema.model_validate(user)
+            user_schema = UserSchema.model_validate(user)
+        # a lagging replica could still return a user deleted moments ago
+        if not self.async_session.from_replica or not user_cache.invalidated_within(
+            settings.DB_REPLICA_STICKY_SECONDS
+        ):
+            user_cache.set(username, user_schema, generation)
+        return user_schema
 
 
 class RegisterUser:
@@ -35,18 +52,25 @@ class RegisterUser:
         self.async_session = session
 
     async def execute(self, email: str, username: str, password: str) -> UserSchema:
-        async with self.async_session.begin() as session:
+        # rejected registrations shouldn't cost a bcrypt run, so check before hashing
+        async with self.async_session() as session:
             uniq = await User.read_by_email_or_username(session, email, username)
-            if uniq and uniq.email == email:
-                raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Email is already taken")
-            elif uniq and uniq.username == username:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username is already taken",
-                )
-
-            user = await User.create(session, email, username, get_password_hash(password))
-            return UserSchema.model_validate(user)
+            check_user_is_unique(uniq, email, username)
+
+        await self.async_session.release()
+        password_hash = await password_hasher.hash(password)
+        try:
+            async with self.async_session.begin() as session:
+                user = await User.create(session, email, username, password_hash)
+                user_schema = UserSchema.model_validate(user)
+        except IntegrityError:
+            # registered by a concurrent request while the password was hashed
+            async with self.async_session() as session:
+                uniq = await User.read_by_email_or_username(session, email, username)
+                check_user_is_unique(uniq, email, username)
+            raise
+        user_cache.invalidate(username)
+        return user_schema
 
 
 class AuthenticateUser:
@@ -54,17 +78,20 @@ class AuthenticateUser:
         self.async_session = session
 
     async def execute(self, username: str, password: str) -> UserSchema:
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
         async with self.async_session() as session:
-            credentials_exception = HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-            )
             user = await User.read_by_username(session, username)
             if not user:
                 raise credentials_exception
-            if not verify_password(password, user.password):
-                raise credentials_exception
-            return UserSchema.model_validate(user)
+            user_schema = UserSchema.model_validate(user)
+
+        await self.async_session.release()
+        if not await password_hasher.verify(password, user_schema.password):
+            raise credentials_exception
+        return user_schema
 
 
 class DeleteUser:
@@ -73,4 +100,8 @@ class DeleteUser:
 
     async def execute(self, username: str) -> None:
         async with self.async_session.begin() as session:
-            await User.delete_user(session, username)
+            user_id = await User.delete_user(session, username)
+        user_cache.invalidate(username)
+        if user_id is not None:
+            await token_revocations.revoke(user_id)
+            await public_goals_cache.invalidate()
@@ -0,0 +1,80 @@
+import time
+from typing import Any, Protocol
+
+from app.config import settings
+
+
+class RevocationBackend(Protocol):
+    async def revoke(self, user_id: int) -> None:
+        ...
+
+    async def is_revoked(self, user_id: int) -> bool:
+        ...
+
+    async def clear(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+# only this process sees the revocations, which is enough while tokens are checked against
+# the database; stateless tokens need the redis backend
+class MemoryRevocationBackend:
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._revoked: dict[int, float] = {}
+
+    async def revoke(self, user_id: int) -> None:
+        self._prune()
+        self._revoked[user_id] = time.monotonic()
+
+    async def is_revoked(self, user_id: int) -> bool:
+        return user_id in self._revoked
+
+    async def clear(self) -> None:
+        self._revoked.clear()
+
+    async def close(self) -> None:
+        self._revoked.clear()
+
+    def _prune(self) -> None:
+        # every token issued before the revocation has expired by now
+        deadline = time.monotonic() - self.ttl
+        for user_id, revoked_at in list(self._revoked.items()):
+            if revoked_at < deadline:
+                del self._revoked[user_id]
+
+
+# one key per revoked user, shared by every worker and kept until the user's last token expires
+class RedisRevocationBackend:
+    def __init__(self, client: Any, ttl: float, namespace: str = "token:revoked") -> None:
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+        self.namespace = namespace
+
+    async def revoke(self, user_id: int) -> None:
+        await self.client.set(f"{self.namespace}:{user_id}", 1, ex=self.ttl)
+
+    async def is_revoked(self, user_id: int) -> bool:
+        return bool(await self.client.exists(f"{self.namespace}:{user_id}"))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(f"{self.namespace}:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_revocation_backend() -> RevocationBackend:
+    ttl = settings.JWT_EXPIRE_MINUTES * 60
+    if settings.JWT_REVOCATION_REDIS_URL:
+        from redis.asyncio import Redis
+
+        return RedisRevocationBackend(Redis.from_url(settings.JWT_REVOCATION_REDIS_URL), ttl=ttl)
+    return MemoryRevocationBackend(ttl=ttl)
+
+
+token_revocations = create_revocation_backend()
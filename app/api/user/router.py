@@ -3,7 +3,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.models.schema import UserSchema
+from app.models.schema import PrincipalSchema
 
 from .jwt import create_access_token, get_current_user_from_token
 from .models import AuthenticateUser, DeleteUser, ReadUserByUsername, RegisterUser
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/user", tags=["user"])
 
 @router.get("", response_model=UserResponse)
 async def get_current_user(
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)]
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)]
 ) -> UserResponse:
     return UserResponse(
         id=current_user.id, email=current_user.email, username=current_user.username
@@ -36,7 +36,7 @@ async def register_user(
 
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
-    current_user: Annotated[UserSchema, Depends(get_current_user_from_token)],
+    current_user: Annotated[PrincipalSchema, Depends(get_current_user_from_token)],
     use_case: DeleteUser = Depends(DeleteUser),
 ) -> None:
     await use_case.execute(current_user.username)
@@ -55,7 +55,9 @@ async def login_for_access_token(
             detail="Incorect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(
+        data={"sub": user.username, "uid": user.id, "email": user.email}
+    )
     response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
     return TokenResponce(access_token=access_token, token_type="bearer")
 
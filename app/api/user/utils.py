@@ -0,0 +1,13 @@
+from fastapi import HTTPException, status
+
+from app.models import User
+
+
+def check_user_is_unique(existing: User | None, email: str, username: str) -> None:
+    if existing and existing.email == email:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Email is already taken")
+    elif existing and existing.username == username:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username is already taken",
+        )
@@ -0,0 +1,74 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(
+        self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # bumped by every invalidation, see set()
+        self.generation = 0
+        self.invalidated_at = -math.inf
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= self.timer():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, generation: int | None = None) -> None:
+        # a value read before an invalidation may already be stale, so callers pass the
+        # generation they saw before reading it
+        if self.maxsize <= 0 or (generation is not None and generation != self.generation):
+            return
+
+        self._data[key] = (self.timer() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        self.generation += 1
+        self.invalidated_at = self.timer()
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.invalidated_at = self.timer()
+        self._data.clear()
+
+    # a replica may still serve data from before an invalidation this recent
+    def invalidated_within(self, seconds: float) -> bool:
+        return self.timer() - self.invalidated_at < seconds
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,3 +1,6 @@
+from typing import Literal
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -8,9 +11,51 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = True
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_STICKY_SECONDS: float = 5
+    DB_REPLICA_RETRY_SECONDS: float = 30
+    DB_QUERY_WARN_COUNT: int = 20
+
     JWT_SECRET: str
     JWT_EXPIRE_MINUTES: int
     JWT_ALGORITHM: str
+    JWT_STATELESS: bool = False
+    JWT_EPOCH: int = 0
+    JWT_REVOCATION_REDIS_URL: str = ""
+
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: float = 30
+
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+
+    GOAL_BATCH_MAX_SIZE: int = 500
+    GOAL_STREAM_MAX_LIMIT: int = 10000
+    TARGET_PROGRESS_BATCH_MAX_SIZE: int = 1000
+
+    PROGRESS_BUFFER_ENABLED: bool = False
+    PROGRESS_BUFFER_FLUSH_MS: int = 200
+    PROGRESS_BUFFER_MAX_ENTRIES: int = 1000
+
+    PUBLIC_GOALS_CACHE_ENABLED: bool = True
+    PUBLIC_GOALS_CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    PUBLIC_GOALS_CACHE_SIZE: int = 256
+    PUBLIC_GOALS_CACHE_TTL: float = 5
+    PUBLIC_GOALS_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    @model_validator(mode="after")
+    def check_stateless_revocations(self) -> "Settings":
+        # without shared revocations a deleted user's token stays valid on other workers
+        if self.JWT_STATELESS and not self.JWT_REVOCATION_REDIS_URL:
+            raise ValueError("JWT_STATELESS requires JWT_REVOCATION_REDIS_URL")
+        return self
 
     class Config:
         env_file = ".env"
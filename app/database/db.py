@@ -1,19 +1,49 @@
 import logging
-from typing import Annotated, AsyncIterator
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator, Awaitable, Callable
 
-from fastapi import Depends
+from fastapi import Depends, Request, Response
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.ext.asyncio import AsyncSession as SQLAlchemyAsyncSession
 
 from app.config import settings
 
+from .pool import InstrumentedPool
+from .replicas import ReplicaRouter, ReplicaSessions
+
 DATABASE_URL = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+PRIMARY_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
 logger = logging.getLogger(__name__)
 
-async_engine = create_async_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False,
+
+def create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args={"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE},
+        echo=False,
+    )
+
+
+async_engine = create_engine(DATABASE_URL)
+replica_router = ReplicaRouter(
+    [create_engine(url.strip()) for url in settings.DB_REPLICA_URLS.split(",") if url.strip()],
+    retry_after=settings.DB_REPLICA_RETRY_SECONDS,
 )
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
@@ -22,11 +52,106 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
-async def get_session() -> AsyncIterator[async_sessionmaker]:
+# used like an async_sessionmaker, but every session opened while serving a request shares
+# one pooled connection, checked out on first use and returned by close() or release()
+class RequestSessions:
+    from_replica = False
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.connection: AsyncConnection | None = None
+        self.sessionmaker = async_sessionmaker(autoflush=False, future=True)
+        self.open_sessions = 0
+
+    @asynccontextmanager
+    async def __call__(self) -> AsyncIterator[SQLAlchemyAsyncSession]:
+        async with self._open() as session:
+            yield session
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[SQLAlchemyAsyncSession]:
+        async with self._open() as session, session.begin():
+            yield session
+
+    @asynccontextmanager
+    async def _open(self) -> AsyncIterator[SQLAlchemyAsyncSession]:
+        self.open_sessions += 1
+        try:
+            async with self.sessionmaker(bind=await self.connect()) as session:
+                yield session
+        finally:
+            self.open_sessions -= 1
+
+    # hands the connection back to the pool before slow work that needs no database, such as
+    # bcrypt; a later session checks out a new one
+    async def release(self) -> None:
+        if not self.open_sessions:
+            await self.close()
+
+    async def connect(self) -> AsyncConnection:
+        if self.connection is None:
+            self.connection = await self.engine.connect()
+        return self.connection
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+
+def pool_stats() -> dict:
+    pool = async_engine.sync_engine.pool
+    return pool.stats() if isinstance(pool, InstrumentedPool) else {"status": pool.status()}
+
+
+async def get_session() -> AsyncIterator[RequestSessions]:
+    sessions = RequestSessions(async_engine)
     try:
-        yield AsyncSessionLocal
+        yield sessions
     except SQLAlchemyError as e:
         logger.exception(e)
+    finally:
+        await sessions.close()
+
+
+AsyncSession = Annotated[RequestSessions, Depends(get_session)]
+
+
+def reads_from_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_session(
+    request: Request, sessions: AsyncSession
+) -> AsyncIterator[RequestSessions | ReplicaSessions]:
+    engine = None if reads_from_primary(request) else replica_router.choose()
+    if engine is None:
+        yield sessions
+        return
+
+    replica_sessions = ReplicaSessions(replica_router, engine, sessions)
+    try:
+        yield replica_sessions
+    finally:
+        await replica_sessions.close()
+
+
+ReadOnlyAsyncSession = Annotated[RequestSessions | ReplicaSessions, Depends(get_read_session)]
 
 
-AsyncSession = Annotated[async_sessionmaker, Depends(get_session)]
+async def read_your_writes(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    # after a successful write the client reads from primary until replicas have caught up
+    response = await call_next(request)
+    if replica_router.engines and request.method not in SAFE_METHODS and response.status_code < 400:
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            str(time.time() + settings.DB_REPLICA_STICKY_SECONDS),
+            max_age=math.ceil(settings.DB_REPLICA_STICKY_SECONDS),
+            httponly=True,
+        )
+    return response
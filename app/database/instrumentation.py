@@ -0,0 +1,108 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExecutionContext
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms:.2f};desc="{self.count} queries"'
+
+
+# statements issued while serving the current request, None outside of a request
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+# listening on the Engine class covers the primary, the replicas and any engine built in tests
+@event.listens_for(Engine, "before_cursor_execute")
+def before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    stats = query_stats.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.duration += time.perf_counter() - started.pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def handle_error(context: Any) -> None:
+    # a failed statement never reaches after_cursor_execute
+    started = context.connection.info.get("query_started") if context.connection else None
+    if query_stats.get() is not None and started:
+        started.pop()
+
+
+async def query_timing(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    # streamed bodies run their queries after this returns, so they are not counted
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        query_stats.reset(token)
+
+    response.headers.append("Server-Timing", stats.server_timing())
+    duration_ms = (time.perf_counter() - started) * 1000
+    level = logging.INFO
+    if settings.DB_QUERY_WARN_COUNT and stats.count > settings.DB_QUERY_WARN_COUNT:
+        # most likely a query issued per row
+        level = logging.WARNING
+    logger.log(
+        level,
+        "%s %s %s: %d queries in %.2f ms, %.2f ms total",
+        request.method,
+        request.url.path,
+        response.status_code,
+        stats.count,
+        stats.duration_ms,
+        duration_ms,
+        extra={
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "db_queries": stats.count,
+            "db_duration_ms": round(stats.duration_ms, 2),
+            "duration_ms": round(duration_ms, 2),
+        },
+    )
+    return response
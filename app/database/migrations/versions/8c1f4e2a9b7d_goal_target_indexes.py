@@ -0,0 +1,53 @@
+"""goal target indexes
+
+Revision ID: 8c1f4e2a9b7d
+Revises: 2486e1d5cef6
+Create Date: 2026-10-18 09:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c1f4e2a9b7d"
+down_revision: Union[str, None] = "2486e1d5cef6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_goal_user_id_id"),
+            "goal",
+            ["user_id", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_goal_public_id"),
+            "goal",
+            ["id"],
+            unique=False,
+            postgresql_where=sa.text("private = false"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_target_goal_id_id"),
+            "target",
+            ["goal_id", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_target_goal_id_id"), table_name="target", postgresql_concurrently=True
+        )
+        op.drop_index(op.f("ix_goal_public_id"), table_name="goal", postgresql_concurrently=True)
+        op.drop_index(op.f("ix_goal_user_id_id"), table_name="goal", postgresql_concurrently=True)
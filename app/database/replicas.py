@@ -0,0 +1,105 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+
+from .pool import InstrumentedPool
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        retry_after: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.engines = engines
+        self.retry_after = retry_after
+        self.timer = timer
+        self.routed = 0
+        self.failures = 0
+        self._failed_until: dict[int, float] = {}
+        self._next = 0
+
+    def choose(self) -> AsyncEngine | None:
+        now = self.timer()
+        for _ in range(len(self.engines)):
+            index = self._next % len(self.engines)
+            self._next += 1
+            if self._failed_until.get(index, 0) <= now:
+                self.routed += 1
+                return self.engines[index]
+        return None
+
+    def mark_failed(self, engine: AsyncEngine) -> None:
+        self.failures += 1
+        self._failed_until[self.engines.index(engine)] = self.timer() + self.retry_after
+
+    def healthy(self) -> int:
+        now = self.timer()
+        return sum(
+            1 for index in range(len(self.engines)) if self._failed_until.get(index, 0) <= now
+        )
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "replicas": len(self.engines),
+            "healthy": self.healthy(),
+            "routed": self.routed,
+            "failures": self.failures,
+            "pools": [
+                engine.sync_engine.pool.stats()
+                for engine in self.engines
+                if isinstance(engine.sync_engine.pool, InstrumentedPool)
+            ],
+        }
+
+
+# read-only counterpart of RequestSessions: sessions share one replica connection, and if
+# the replica can't be reached it's taken out of rotation and reads go to `primary` instead
+class ReplicaSessions:
+    def __init__(self, router: ReplicaRouter, engine: AsyncEngine, primary: Any) -> None:
+        self.router = router
+        self.engine: AsyncEngine | None = engine
+        self.primary = primary
+        self.connection: AsyncConnection | None = None
+        self.sessionmaker = async_sessionmaker(autoflush=False, future=True)
+
+    # false once the replica turned out to be unreachable and reads went to the primary
+    @property
+    def from_replica(self) -> bool:
+        return self.connection is not None
+
+    @asynccontextmanager
+    async def __call__(self) -> AsyncIterator[AsyncSession]:
+        connection = await self.connect()
+        sessions = (
+            self.primary if connection is None else partial(self.sessionmaker, bind=connection)
+        )
+        async with sessions() as session:
+            yield session
+
+    async def connect(self) -> AsyncConnection | None:
+        if self.connection is None and self.engine is not None:
+            try:
+                self.connection = await self.engine.connect()
+            except (OSError, DBAPIError):
+                logger.warning("Replica %s is unavailable, reading from primary", self.engine.url)
+                self.router.mark_failed(self.engine)
+                self.engine = None
+        return self.connection
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
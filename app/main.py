@@ -1,8 +1,33 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
+from app.api.goal.cache import public_goals_cache
 from app.api.main import router
+from app.api.target.buffer import progress_buffer
+from app.api.user.revocation import token_revocations
+from app.api.user.security import password_hasher
+from app.config import settings
+from app.database.db import read_your_writes, replica_router
+from app.database.instrumentation import query_timing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if settings.PROGRESS_BUFFER_ENABLED:
+        progress_buffer.start()
+    yield
+    await progress_buffer.stop()
+    password_hasher.shutdown()
+    await public_goals_cache.close()
+    await token_revocations.close()
+    await replica_router.dispose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.middleware("http")(read_your_writes)
+app.middleware("http")(query_timing)
 
 app.include_router(router)
 
@@ -1,5 +1,5 @@
 from .base import Base
 from .goal import Goal
-from .schema import GoalSchema, TargetSchema, UserSchema
+from .schema import GoalSchema, PrincipalSchema, TargetSchema, UserSchema
 from .target import Target
 from .user import User
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import TYPE_CHECKING, AsyncIterator
+from typing import TYPE_CHECKING, AsyncIterator, Iterable
 
-from sqlalchemy import ForeignKey, func, select
+from sqlalchemy import (
+    JSON,
+    ForeignKey,
+    Index,
+    Row,
+    Select,
+    func,
+    insert,
+    lambda_stmt,
+    select,
+    text,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload
 
 from .base import Base
+from .schema import GoalSchema
 from .target import Target
 
 if TYPE_CHECKING:
@@ -16,6 +31,10 @@ if TYPE_CHECKING:
 
 class Goal(Base):
     __tablename__ = "goal"
+    __table_args__ = (
+        Index("ix_goal_user_id_id", "user_id", "id"),
+        Index("ix_goal_public_id", "id", postgresql_where=text("private = false")),
+    )
 
     id: Mapped[int] = mapped_column(
         "id", autoincrement=True, nullable=False, unique=True, primary_key=True
@@ -26,6 +45,7 @@ class Goal(Base):
     created_at: Mapped[datetime] = mapped_column(
         "created_at", server_default=func.now(), nullable=False
     )
+    version: Mapped[int] = mapped_column("version", nullable=False, server_default=text("1"))
     targets: Mapped[list[Target]] = relationship(
         "Target",
         back_populates="goal",
@@ -35,41 +55,209 @@ class Goal(Base):
     user_id: Mapped[int] = mapped_column("user_id", ForeignKey("user.id"), nullable=False)
     user: Mapped[User] = relationship("User", back_populates="goals")
 
+    __mapper_args__ = {"version_id_col": version}
+
     @classmethod
     async def read_by_id(cls, session: AsyncSession, id: int) -> Goal | None:
-        stmt = select(cls).where(cls.id == id).options(selectinload(cls.targets))
-        return await session.scalar(stmt.order_by(cls.id))
+        stmt = lambda_stmt(
+            lambda: select(cls)
+            .where(cls.id == id)
+            .options(selectinload(cls.targets))
+            .order_by(cls.id)
+        )
+        return await session.scalar(stmt)
 
     @classmethod
     async def read_user_goals(
-        cls, session: AsyncSession, user_id: int, limit: int, offset: int
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        limit: int,
+        offset: int,
+        after_id: int | None = None,
     ) -> AsyncIterator[Goal]:
         stmt = (
             select(cls)
             .where(cls.user_id == user_id)
             .limit(limit)
-            .offset(offset)
             .options(selectinload(cls.targets))
         )
+        if after_id is not None:
+            stmt = stmt.where(cls.id > after_id)
+        else:
+            stmt = stmt.offset(offset)
         stream = await session.stream_scalars(stmt.order_by(cls.id))
         async for row in stream:
             yield row
 
     @classmethod
     async def read_public_goals(
-        cls, session: AsyncSession, limit: int, offset: int
+        cls, session: AsyncSession, limit: int, offset: int, after_id: int | None = None
     ) -> AsyncIterator[Goal]:
         stmt = (
             select(cls)
             .where(cls.private == False)  # noqa
             .limit(limit)
-            .offset(offset)
             .options(selectinload(cls.targets))
         )
+        if after_id is not None:
+            stmt = stmt.where(cls.id > after_id)
+        else:
+            stmt = stmt.offset(offset)
         stream = await session.stream_scalars(stmt.order_by(cls.id))
         async for row in stream:
             yield row
 
+    @classmethod
+    def view_stmt(cls) -> Select:
+        target_json = func.json_build_object(
+            "id",
+            Target.id,
+            "title",
+            Target.title,
+            "target",
+            Target.target,
+            "progress",
+            Target.progress,
+            "goal_id",
+            Target.goal_id,
+            "version",
+            Target.version,
+        )
+        targets_order = aggregate_order_by(target_json, Target.id)  # type: ignore
+        targets = (
+            select(func.coalesce(func.json_agg(targets_order), text("'[]'::json")))
+            .where(Target.goal_id == cls.id)
+            .scalar_subquery()
+        )
+        return select(
+            cls.id,
+            cls.title,
+            cls.description,
+            cls.private,
+            cls.created_at,
+            cls.user_id,
+            cls.version,
+            type_coerce(targets, JSON).label("targets"),
+        )
+
+    @classmethod
+    async def read_access_by_id(cls, session: AsyncSession, id: int) -> Row | None:
+        stmt = lambda_stmt(
+            lambda: select(cls.id, cls.user_id, cls.private, cls.version).where(cls.id == id)
+        )
+        return (await session.execute(stmt)).one_or_none()
+
+    @classmethod
+    async def read_user_goal_versions(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        limit: int,
+        offset: int,
+        after_id: int | None = None,
+    ) -> list[Row]:
+        stmt = select(cls.id, cls.version).where(cls.user_id == user_id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(cls.id > after_id)
+        else:
+            stmt = stmt.offset(offset)
+        return list((await session.execute(stmt.order_by(cls.id))).all())
+
+    @classmethod
+    async def read_view_by_id(cls, session: AsyncSession, id: int) -> Row | None:
+        result = await session.execute(lambda_stmt(lambda: cls.view_stmt().where(cls.id == id)))
+        return result.one_or_none()
+
+    @classmethod
+    async def read_user_goal_views(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        limit: int,
+        offset: int,
+        after_id: int | None = None,
+    ) -> AsyncIterator[Row]:
+        stmt = lambda_stmt(
+            lambda: cls.view_stmt().where(cls.user_id == user_id).order_by(cls.id).limit(limit)
+        )
+        if after_id is not None:
+            stmt += lambda s: s.where(cls.id > after_id)
+        else:
+            stmt += lambda s: s.offset(offset)
+        async for row in await session.stream(stmt):
+            yield row
+
+    @classmethod
+    async def read_public_goal_views(
+        cls, session: AsyncSession, limit: int, offset: int, after_id: int | None = None
+    ) -> AsyncIterator[Row]:
+        stmt = lambda_stmt(
+            lambda: cls.view_stmt()
+            .where(cls.private == False)  # noqa
+            .order_by(cls.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt += lambda s: s.where(cls.id > after_id)
+        else:
+            stmt += lambda s: s.offset(offset)
+        async for row in await session.stream(stmt):
+            yield row
+
+    @classmethod
+    async def export_user_goals(
+        cls, session: AsyncSession, user_id: int, chunk_size: int = 1000
+    ) -> AsyncIterator[GoalSchema]:
+        stmt = (
+            select(
+                cls.id,
+                cls.title,
+                cls.description,
+                cls.private,
+                cls.created_at,
+                cls.user_id,
+                cls.version,
+                Target.id.label("target_id"),
+                Target.title.label("target_title"),
+                Target.target.label("target_target"),
+                Target.progress.label("target_progress"),
+                Target.version.label("target_version"),
+            )
+            .outerjoin(Target, Target.goal_id == cls.id)
+            .where(cls.user_id == user_id)
+            .order_by(cls.id, Target.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        goal: dict | None = None
+        async for row in await session.stream(stmt):
+            if not goal or goal["id"] != row.id:
+                if goal:
+                    yield GoalSchema.model_validate(goal)
+                goal = {
+                    "id": row.id,
+                    "title": row.title,
+                    "description": row.description,
+                    "private": row.private,
+                    "created_at": row.created_at,
+                    "user_id": row.user_id,
+                    "version": row.version,
+                    "targets": [],
+                }
+            if row.target_id is not None:
+                goal["targets"].append(
+                    {
+                        "id": row.target_id,
+                        "title": row.target_title,
+                        "target": row.target_target,
+                        "progress": row.target_progress,
+                        "goal_id": row.id,
+                        "version": row.target_version,
+                    }
+                )
+        if goal:
+            yield GoalSchema.model_validate(goal)
+
     @classmethod
     async def add_goal(
         cls,
@@ -79,28 +267,72 @@ class Goal(Base):
         private: bool,
         user_id: int,
         targets: list[Target],
-    ) -> Goal:
-        goal = Goal(
-            title=title,
-            description=description,
-            private=private,
-            user_id=user_id,
+    ) -> GoalSchema:
+        goal = {
+            "title": title,
+            "description": description,
+            "private": private,
+            "targets": [
+                {"title": target.title, "target": target.target, "progress": target.progress}
+                for target in targets
+            ],
+        }
+        return (await cls.add_goals(session, user_id, [goal]))[0]
+
+    @classmethod
+    async def add_goals(
+        cls, session: AsyncSession, user_id: int, goals: list[dict]
+    ) -> list[GoalSchema]:
+        if not goals:
+            return []
+
+        goal_stmt = insert(cls).returning(
+            cls.id,
+            cls.title,
+            cls.description,
+            cls.private,
+            cls.created_at,
+            cls.user_id,
+            cls.version,
+            sort_by_parameter_order=True,
+        )
+        goal_result = await session.execute(
+            goal_stmt,
+            [
+                {
+                    "title": goal["title"],
+                    "description": goal["description"],
+                    "private": goal["private"],
+                    "user_id": user_id,
+                }
+                for goal in goals
+            ],
         )
-        session.add(goal)
-        for target in targets:
-            target = Target(
-                title=target.title,
-                target=target.target,
-                goal=goal,
-                progress=target.progress,
+        goal_rows = goal_result.all()
+
+        targets: dict[int, list[dict]] = {row.id: [] for row in goal_rows}
+        target_params = [
+            {**target, "goal_id": row.id}
+            for goal, row in zip(goals, goal_rows)
+            for target in goal["targets"]
+        ]
+        if target_params:
+            target_stmt = insert(Target).returning(
+                Target.id,
+                Target.title,
+                Target.target,
+                Target.progress,
+                Target.goal_id,
+                Target.version,
+                sort_by_parameter_order=True,
             )
-            session.add(target)
-        await session.flush()
+            for target_row in await session.execute(target_stmt, target_params):
+                targets[target_row.goal_id].append(dict(target_row._mapping))
 
-        new = await cls.read_by_id(session, goal.id)
-        if not new:
-            raise RuntimeError()
-        return new
+        return [
+            GoalSchema.model_validate({**row._mapping, "targets": targets[row.id]})
+            for row in goal_rows
+        ]
 
     async def update(
         self, session: AsyncSession, title: str, description: str, private: bool
@@ -110,6 +342,17 @@ class Goal(Base):
         self.private = private
         await session.flush()
 
+    @classmethod
+    async def bump_versions(cls, session: AsyncSession, ids: Iterable[int]) -> None:
+        # sorted so concurrent bulk updates lock goal rows in the same order
+        stmt = (
+            update(cls)
+            .where(cls.id.in_(sorted(set(ids))))
+            .values(version=cls.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
+
     @classmethod
     async def delete(cls, session: AsyncSession, goal: Goal) -> None:
         await session.delete(goal)
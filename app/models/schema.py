@@ -9,6 +9,7 @@ class TargetSchema(BaseModel):
     target: int
     progress: int
     goal_id: int
+    version: int
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -20,6 +21,7 @@ class GoalSchema(BaseModel):
     private: bool
     created_at: datetime
     user_id: int
+    version: int
     targets: list[TargetSchema]
 
     model_config = ConfigDict(from_attributes=True)
@@ -33,3 +35,11 @@ class UserSchema(BaseModel):
     password: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PrincipalSchema(BaseModel):
+    id: int
+    email: str
+    username: str
+
+    model_config = ConfigDict(from_attributes=True)
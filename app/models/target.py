@@ -2,7 +2,23 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, select, text
+from sqlalchemy import (
+    ColumnElement,
+    Delete,
+    ForeignKey,
+    Index,
+    Integer,
+    Row,
+    Update,
+    column,
+    delete,
+    func,
+    lambda_stmt,
+    select,
+    text,
+    update,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,6 +30,7 @@ if TYPE_CHECKING:
 
 class Target(Base):
     __tablename__ = "target"
+    __table_args__ = (Index("ix_target_goal_id_id", "goal_id", "id"),)
 
     id: Mapped[int] = mapped_column(
         "id", autoincrement=True, nullable=False, unique=True, primary_key=True
@@ -23,19 +40,25 @@ class Target(Base):
     target: Mapped[int] = mapped_column("target", nullable=False)
     goal_id: Mapped[int] = mapped_column("goal_id", ForeignKey("goal.id"), nullable=False)
     goal: Mapped[Goal] = relationship("Goal", back_populates="targets")
+    version: Mapped[int] = mapped_column("version", nullable=False, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": version}
 
     @classmethod
     async def read_by_id(cls, session: AsyncSession, id: int) -> Target | None:
-        stmt = select(cls).where(cls.id == id)
-        return await session.scalar(stmt.order_by(cls.id))
+        stmt = lambda_stmt(lambda: select(cls).where(cls.id == id).order_by(cls.id))
+        return await session.scalar(stmt)
 
     @classmethod
     async def add(
         cls, session: AsyncSession, title: str, target: int, goal_id: int, progress: int
     ) -> Target:
+        from .goal import Goal
+
         target_cls = Target(title=title, target=target, goal_id=goal_id, progress=progress)
         session.add(target_cls)
         await session.flush()
+        await Goal.bump_versions(session, [goal_id])
 
         new = await cls.read_by_id(session, target_cls.id)
         if not new:
@@ -43,12 +66,157 @@ class Target(Base):
         return new
 
     @classmethod
-    async def delete(cls, session: AsyncSession, target: Target) -> None:
-        await session.delete(target)
-        await session.flush()
+    async def read_version_by_id(cls, session: AsyncSession, id: int, goal_id: int) -> int | None:
+        stmt = lambda_stmt(lambda: select(cls.version).where(cls.id == id, cls.goal_id == goal_id))
+        return await session.scalar(stmt)
 
-    async def update(self, session: AsyncSession, title: str, target: int, progress: int) -> None:
-        self.title = title
-        self.target = target
-        self.progress = progress
-        await session.flush()
+    @classmethod
+    async def update_owned(
+        cls,
+        session: AsyncSession,
+        id: int,
+        goal_id: int,
+        user_id: int,
+        title: str,
+        target: int,
+        progress: int,
+        versions: list[int] | None = None,
+    ) -> Row | None:
+        from .goal import Goal
+
+        stmt = (
+            update(cls)
+            .where(
+                cls.id == id,
+                cls.goal_id == goal_id,
+                Goal.id == cls.goal_id,
+                Goal.user_id == user_id,
+            )
+            .values(title=title, target=target, progress=progress, version=cls.version + 1)
+            .returning(
+                cls.id, cls.title, cls.target, cls.progress, cls.goal_id, cls.version, Goal.private
+            )
+        )
+        if versions is not None:
+            stmt = stmt.where(cls.version.in_(versions))
+        return await cls._execute_and_bump_goal(session, stmt)
+
+    @classmethod
+    async def delete_owned(
+        cls, session: AsyncSession, id: int, goal_id: int, user_id: int
+    ) -> Row | None:
+        from .goal import Goal
+
+        stmt = (
+            delete(cls)
+            .where(
+                cls.id == id,
+                cls.goal_id == goal_id,
+                Goal.id == cls.goal_id,
+                Goal.user_id == user_id,
+            )
+            .returning(cls.id, cls.goal_id, Goal.private)
+        )
+        return await cls._execute_and_bump_goal(session, stmt)
+
+    @classmethod
+    async def _execute_and_bump_goal(
+        cls, session: AsyncSession, stmt: Update | Delete
+    ) -> Row | None:
+        rows = await cls._execute_and_bump_goals(session, stmt)
+        return rows[0] if rows else None
+
+    @classmethod
+    async def _execute_and_bump_goals(
+        cls, session: AsyncSession, stmt: Update | Delete
+    ) -> list[Row]:
+        from .goal import Goal
+
+        # both writes go out as one statement through data-modifying CTEs
+        changed = stmt.cte("changed")
+        bumped = (
+            update(Goal)
+            .where(Goal.id.in_(select(changed.c.goal_id)))
+            .values(version=Goal.version + 1)
+            .cte("bumped")
+        )
+        result = await session.execute(select(changed).add_cte(bumped))
+        return list(result.all())
+
+    @classmethod
+    async def update_progress_many(
+        cls, session: AsyncSession, user_id: int, progress: dict[int, int]
+    ) -> list[Row]:
+        from .goal import Goal
+
+        progress_values = values(
+            column("id", Integer), column("progress", Integer), name="progress_values"
+        ).data(list(progress.items()))
+        stmt = (
+            update(cls)
+            .where(
+                cls.id == progress_values.c.id,
+                cls.goal_id == Goal.id,
+                Goal.user_id == user_id,
+                progress_values.c.progress <= cls.target,
+            )
+            .values(progress=progress_values.c.progress, version=cls.version + 1)
+            .returning(
+                cls.id, cls.title, cls.target, cls.progress, cls.goal_id, cls.version, Goal.private
+            )
+        )
+        return await cls._execute_and_bump_goals(session, stmt)
+
+    @classmethod
+    async def increment_progress(
+        cls, session: AsyncSession, id: int, user_id: int, delta: int, clamp: bool
+    ) -> Row | None:
+        from .goal import Goal
+
+        stmt = update(cls).where(cls.id == id, cls.goal_id == Goal.id, Goal.user_id == user_id)
+        progress: ColumnElement[int] = cls.progress + delta
+        if clamp:
+            progress = func.least(func.greatest(progress, 0), cls.target)
+        else:
+            stmt = stmt.where(progress <= cls.target)
+
+        stmt = stmt.values(progress=progress, version=cls.version + 1).returning(
+            cls.id, cls.title, cls.target, cls.progress, cls.goal_id, cls.version, Goal.private
+        )
+        return await cls._execute_and_bump_goal(session, stmt)
+
+    @classmethod
+    async def read_owner_id(cls, session: AsyncSession, id: int) -> int | None:
+        from .goal import Goal
+
+        stmt = select(Goal.user_id).join(cls, cls.goal_id == Goal.id).where(cls.id == id)
+        return await session.scalar(stmt)
+
+    @classmethod
+    async def increment_progress_many(
+        cls, session: AsyncSession, deltas: list[tuple[int, int, int]]
+    ) -> list[Row]:
+        from .goal import Goal
+
+        delta_values = values(
+            column("id", Integer),
+            column("user_id", Integer),
+            column("delta", Integer),
+            name="delta_values",
+        ).data(deltas)
+        stmt = (
+            update(cls)
+            .where(
+                cls.id == delta_values.c.id,
+                cls.goal_id == Goal.id,
+                Goal.user_id == delta_values.c.user_id,
+            )
+            .values(
+                progress=func.least(
+                    func.greatest(cls.progress + delta_values.c.delta, 0), cls.target
+                ),
+                version=cls.version + 1,
+            )
+            .returning(cls.id, cls.goal_id, Goal.private)
+        )
+        return await cls._execute_and_bump_goals(session, stmt)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import delete, func, lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -34,8 +34,8 @@ class User(Base):
 
     @classmethod
     async def read_by_id(cls, session: AsyncSession, user_id: int) -> User | None:
-        stmt = select(cls).where(cls.id == user_id)
-        return await session.scalar(stmt.order_by(cls.id))
+        stmt = lambda_stmt(lambda: select(cls).where(cls.id == user_id).order_by(cls.id))
+        return await session.scalar(stmt)
 
     @classmethod
     async def read_by_email_or_username(
@@ -46,13 +46,13 @@ class User(Base):
 
     @classmethod
     async def read_by_username(cls, session: AsyncSession, username: str) -> User | None:
-        stmt = select(cls).where(cls.username == username)
+        stmt = lambda_stmt(lambda: select(cls).where(cls.username == username))
         return await session.scalar(stmt)
 
     @classmethod
-    async def delete_user(cls, session: AsyncSession, username: str) -> None:
-        stmt = delete(cls).where(cls.username == username)
-        await session.execute(stmt)
+    async def delete_user(cls, session: AsyncSession, username: str) -> int | None:
+        stmt = delete(cls).where(cls.username == username).returning(cls.id)
+        return await session.scalar(stmt)
 
     @classmethod
     async def create(cls, session: AsyncSession, email: str, username: str, password: str) -> User:
@@ -0,0 +1,108 @@
+from typing import Any
+
+from app.api.goal.cache import FeedCache, MemoryFeedBackend, RedisFeedBackend
+
+
+class FakeRedisPipeline:
+    def __init__(self, client: "FakeRedis") -> None:
+        self.client = client
+        self.commands: list[tuple[str, tuple]] = []
+
+    async def __aenter__(self) -> "FakeRedisPipeline":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        self.commands.clear()
+
+    def hset(self, name: str, key: str, value: bytes) -> None:
+        self.commands.append(("hset", (name, key, value)))
+
+    def expire(self, name: str, ttl: int, nx: bool = False) -> None:
+        self.commands.append(("expire", (name, ttl, nx)))
+
+    async def execute(self) -> list:
+        return [await getattr(self.client, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, bytes]] = {}
+        self.ttls: dict[str, int] = {}
+        self.closed = False
+
+    def pipeline(self, transaction: bool = True) -> FakeRedisPipeline:
+        return FakeRedisPipeline(self)
+
+    async def hget(self, name: str, key: str) -> bytes | None:
+        return self.hashes.get(name, {}).get(key)
+
+    async def hset(self, name: str, key: str, value: bytes) -> int:
+        self.hashes.setdefault(name, {})[key] = value
+        return 1
+
+    async def expire(self, name: str, ttl: int, nx: bool = False) -> bool:
+        if nx and name in self.ttls:
+            return False
+        self.ttls[name] = ttl
+        return True
+
+    async def delete(self, name: str) -> int:
+        self.ttls.pop(name, None)
+        return 1 if self.hashes.pop(name, None) is not None else 0
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+async def test_feed_cache_memory_backend() -> None:
+    cache = FeedCache(MemoryFeedBackend(maxsize=10, ttl=60))
+
+    assert await cache.get("10:0:None") is None
+    await cache.set("10:0:None", b"page", cache.generation)
+    assert await cache.get("10:0:None") == b"page"
+
+    await cache.invalidate()
+    assert await cache.get("10:0:None") is None
+    assert {
+        "backend": "MemoryFeedBackend",
+        "hits": 1,
+        "misses": 2,
+        "hit_ratio": 1 / 3,
+        "invalidations": 1,
+    } == cache.stats()
+
+
+async def test_feed_cache_skips_write_after_invalidation() -> None:
+    cache = FeedCache(MemoryFeedBackend(maxsize=10, ttl=60))
+
+    generation = cache.generation
+    await cache.invalidate()
+    await cache.set("10:0:None", b"stale", generation)
+
+    assert await cache.get("10:0:None") is None
+
+
+async def test_feed_cache_redis_backend() -> None:
+    client = FakeRedis()
+    cache = FeedCache(RedisFeedBackend(client, ttl=5))
+
+    await cache.set("10:0:None", b"page", cache.generation)
+    await cache.set("1:0:None", b"first", cache.generation)
+    assert await cache.get("10:0:None") == b"page"
+    assert {"goal:public": 5} == client.ttls
+
+    await cache.invalidate()
+    assert await cache.get("1:0:None") is None
+    assert {} == client.hashes
+
+    await cache.close()
+    assert client.closed
+
+
+async def test_feed_cache_disabled() -> None:
+    cache = FeedCache(None)
+
+    await cache.set("10:0:None", b"page", cache.generation)
+    assert await cache.get("10:0:None") is None
+    assert not cache.enabled
+    assert 0 == cache.stats()["misses"]
@@ -1,10 +1,15 @@
+import csv
+import io
+import json
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.goal.cache import public_goals_cache
 from app.api.user.jwt import create_access_token
 from app.api.user.security import get_password_hash
-from app.tests.utils import ID_STRING
+from app.tests.utils import ID_STRING, query_count
 
 
 async def setup_data(session: AsyncSession) -> None:
@@ -71,6 +76,141 @@ async def test_goal_add(ac: AsyncClient, session: AsyncSession) -> None:
     assert len(goals) == goals_count + 1
 
 
+@pytest.mark.asyncio
+async def test_goal_add_many_targets(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test2'})}"}
+    targets = [{"title": f"target_{i}", "target": 50, "progress": i} for i in range(50)]
+    response = await ac.post(
+        "/goal",
+        cookies=cookies,
+        json={"title": "many", "description": "many", "private": False, "targets": targets},
+    )
+
+    assert 201 == response.status_code
+    created = response.json()["targets"]
+    assert [{**target, "id": ID_STRING} for target in targets] == created
+    assert sorted(target["id"] for target in created) == [target["id"] for target in created]
+
+    response = await ac.get(f"/goal/{response.json()['id']}", cookies=cookies)
+    assert created == response.json()["targets"]
+
+
+@pytest.mark.asyncio
+async def test_goal_add_batch(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test2'})}"}
+    response = await ac.post(
+        "/goal/batch",
+        cookies=cookies,
+        json=[
+            {
+                "title": "batch1",
+                "description": "batch1",
+                "private": True,
+                "targets": [
+                    {"title": "batch1_1", "target": 5, "progress": 1},
+                    {"title": "batch1_2", "target": 6, "progress": 2},
+                ],
+            },
+            {"title": "batch2", "description": "batch2", "private": False, "targets": []},
+        ],
+    )
+
+    print(response.content)
+    assert 201 == response.status_code
+    expected = {
+        "results": [
+            {
+                "index": 0,
+                "goal": {
+                    "title": "batch1",
+                    "description": "batch1",
+                    "private": True,
+                    "id": ID_STRING,
+                    "user_id": ID_STRING,
+                    "targets": [
+                        {"title": "batch1_1", "target": 5, "progress": 1, "id": ID_STRING},
+                        {"title": "batch1_2", "target": 6, "progress": 2, "id": ID_STRING},
+                    ],
+                },
+            },
+            {
+                "index": 1,
+                "goal": {
+                    "title": "batch2",
+                    "description": "batch2",
+                    "private": False,
+                    "id": ID_STRING,
+                    "user_id": ID_STRING,
+                    "targets": [],
+                },
+            },
+        ]
+    }
+    assert expected == response.json()
+
+
+@pytest.mark.asyncio
+async def test_goal_add_batch_invalid_items(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test2")
+    assert user
+    user_id = user.id
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test2'})}"}
+    goal = {"title": "batch", "description": "batch", "private": False, "targets": []}
+    response = await ac.post(
+        "/goal/batch",
+        cookies=cookies,
+        json=[
+            goal,
+            {**goal, "targets": [{"title": "too far", "target": 1, "progress": 2}]},
+            goal,
+            {"title": "no description", "private": True, "targets": []},
+        ],
+    )
+
+    assert 422 == response.status_code
+    detail = response.json()["detail"]
+    assert [1, 3] == [error["index"] for error in detail]
+    assert [{"msg": "Progress can not be greater than target"}] == detail[0]["errors"]
+    assert ["description"] == detail[1]["errors"][0]["loc"]
+    goals = [gl async for gl in Goal.read_user_goals(session, user_id=user_id, limit=100, offset=0)]
+    assert ["test3"] == [gl.title for gl in goals]
+
+
+@pytest.mark.asyncio
+async def test_goal_add_batch_openapi(ac: AsyncClient) -> None:
+    response = await ac.get("/openapi.json")
+
+    openapi = response.json()
+    body = openapi["paths"]["/goal/batch"]["post"]["requestBody"]
+    items = body["content"]["application/json"]["schema"]["items"]
+    assert "#/components/schemas/GoalWithTargetRequest" == items["$ref"]
+    assert "GoalWithTargetRequest" in openapi["components"]["schemas"]
+
+
+@pytest.mark.asyncio
+async def test_goal_add_batch_too_large(
+    ac: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.config import settings
+
+    await setup_data(session)
+    monkeypatch.setattr(settings, "GOAL_BATCH_MAX_SIZE", 1)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test2'})}"}
+    goal = {"title": "batch", "description": "batch", "private": False, "targets": []}
+    response = await ac.post("/goal/batch", cookies=cookies, json=[goal, goal])
+
+    assert 413 == response.status_code
+
+
 @pytest.mark.asyncio
 async def test_all_goal_read(ac: AsyncClient, session: AsyncSession) -> None:
     await setup_data(session)
@@ -101,7 +241,8 @@ async def test_all_goal_read(ac: AsyncClient, session: AsyncSession) -> None:
                 "user_id": ID_STRING,
                 "targets": [{"title": "test2", "target": 3, "progress": 0, "id": ID_STRING}],
             },
-        ]
+        ],
+        "next_cursor": None,
     }
     assert expected == response.json()
 
@@ -131,11 +272,198 @@ async def test_goal_public_read(ac: AsyncClient, session: AsyncSession) -> None:
                 "user_id": ID_STRING,
                 "targets": [{"title": "test4", "target": 666, "progress": 22, "id": ID_STRING}],
             },
-        ]
+        ],
+        "next_cursor": None,
     }
     assert expected == response.json()
 
 
+@pytest.mark.asyncio
+async def test_goal_public_read_with_cursor(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    response = await ac.get("/goal/public", params={"limit": 1})
+
+    assert 200 == response.status_code
+    first_page = response.json()
+    assert [goal["title"] for goal in first_page["goals"]] == ["test2"]
+    assert first_page["next_cursor"]
+
+    response = await ac.get(
+        "/goal/public", params={"limit": 1, "cursor": first_page["next_cursor"]}
+    )
+
+    assert 200 == response.status_code
+    second_page = response.json()
+    assert [goal["title"] for goal in second_page["goals"]] == ["test3"]
+
+    response = await ac.get(
+        "/goal/public", params={"limit": 1, "cursor": second_page["next_cursor"]}
+    )
+
+    assert 200 == response.status_code
+    assert {"goals": [], "next_cursor": None} == response.json()
+
+
+@pytest.mark.asyncio
+async def test_goal_public_read_cached(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.api.goal.cache import public_goals_cache
+
+    await setup_data(session)
+    before = public_goals_cache.stats()
+
+    first = await ac.get("/goal/public")
+    second = await ac.get("/goal/public")
+
+    assert 200 == second.status_code
+    assert first.content == second.content
+    after = public_goals_cache.stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+
+@pytest.mark.asyncio
+async def test_goal_public_read_invalidated_on_update(
+    ac: AsyncClient, session: AsyncSession
+) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.get("/goal/public")
+    goal_id = response.json()["goals"][0]["id"]
+
+    response = await ac.put(
+        f"/goal/{goal_id}",
+        cookies=cookies,
+        json={"title": "renamed", "description": "test2", "private": False},
+    )
+    assert 200 == response.status_code
+
+    response = await ac.get("/goal/public")
+    assert ["renamed", "test3"] == [goal["title"] for goal in response.json()["goals"]]
+
+    response = await ac.put(
+        f"/goal/{goal_id}",
+        cookies=cookies,
+        json={"title": "renamed", "description": "test2", "private": True},
+    )
+    assert 200 == response.status_code
+
+    response = await ac.get("/goal/public")
+    assert ["test3"] == [goal["title"] for goal in response.json()["goals"]]
+
+
+@pytest.mark.asyncio
+async def test_all_goal_read_with_invalid_cursor(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.get("/goal", params={"cursor": "not a cursor"}, cookies=cookies)
+
+    assert 400 == response.status_code
+
+
+@pytest.mark.asyncio
+async def test_goal_public_read_ndjson(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    response = await ac.get(
+        "/goal/public", params={"limit": 500}, headers={"Accept": "application/x-ndjson"}
+    )
+
+    print(response.content)
+    assert 200 == response.status_code
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    goals = [json.loads(line) for line in response.text.splitlines()]
+    expected = [
+        {
+            "title": "test2",
+            "description": "test2",
+            "private": False,
+            "id": ID_STRING,
+            "user_id": ID_STRING,
+            "targets": [{"title": "test2", "target": 3, "progress": 0, "id": ID_STRING}],
+        },
+        {
+            "title": "test3",
+            "description": "test3",
+            "private": False,
+            "id": ID_STRING,
+            "user_id": ID_STRING,
+            "targets": [{"title": "test4", "target": 666, "progress": 22, "id": ID_STRING}],
+        },
+    ]
+    assert expected == goals
+
+
+@pytest.mark.asyncio
+async def test_goal_public_read_ndjson_next_cursor(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    headers = {"Accept": "application/x-ndjson"}
+    response = await ac.get("/goal/public", params={"limit": 1}, headers=headers)
+
+    assert 200 == response.status_code
+    first, trailer = [json.loads(line) for line in response.text.splitlines()]
+    assert "test2" == first["title"]
+
+    response = await ac.get(
+        "/goal/public", params={"limit": 1, "cursor": trailer["next_cursor"]}, headers=headers
+    )
+
+    assert 200 == response.status_code
+    second, trailer = [json.loads(line) for line in response.text.splitlines()]
+    assert "test3" == second["title"]
+
+    response = await ac.get(
+        "/goal/public", params={"limit": 1, "cursor": trailer["next_cursor"]}, headers=headers
+    )
+
+    assert 200 == response.status_code
+    assert "" == response.text
+
+
+@pytest.mark.asyncio
+async def test_goal_public_read_limit(ac: AsyncClient, session: AsyncSession) -> None:
+    response = await ac.get("/goal/public", params={"limit": 500})
+
+    assert 422 == response.status_code
+
+
+@pytest.mark.asyncio
+async def test_goal_export_ndjson(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.get("/goal/export", cookies=cookies)
+
+    print(response.content)
+    assert 200 == response.status_code
+    goals = [json.loads(line) for line in response.text.splitlines()]
+    assert ["test1", "test2"] == [goal["title"] for goal in goals]
+    assert ["test1", "test3"] == [target["title"] for target in goals[0]["targets"]]
+    assert ["test2"] == [target["title"] for target in goals[1]["targets"]]
+    assert all(goal["created_at"] for goal in goals)
+    assert not any("version" in goal for goal in goals)
+    assert {"id", "title", "target", "progress"} == set(goals[0]["targets"][0])
+
+
+@pytest.mark.asyncio
+async def test_goal_export_csv(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.get("/goal/export", params={"format": "csv"}, cookies=cookies)
+
+    print(response.content)
+    assert 200 == response.status_code
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [("test1", "test1"), ("test1", "test3"), ("test2", "test2")] == [
+        (row["goal_title"], row["target_title"]) for row in rows
+    ]
+
+
 @pytest.mark.asyncio
 async def test_read_goal_by_id(ac: AsyncClient, session: AsyncSession) -> None:
     from app.models import Goal, User
@@ -165,6 +493,71 @@ async def test_read_goal_by_id(ac: AsyncClient, session: AsyncSession) -> None:
     assert expected == response.json()
 
 
+@pytest.mark.asyncio
+async def test_read_goal_by_id_not_modified(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    goal_id = goal.id
+
+    response = await ac.get(f"/goal/{goal_id}", cookies=cookies)
+    etag = response.headers["etag"]
+
+    response = await ac.get(f"/goal/{goal_id}", cookies=cookies, headers={"If-None-Match": etag})
+
+    assert 304 == response.status_code
+    assert etag == response.headers["etag"]
+    assert b"" == response.content
+
+    response = await ac.get(f"/goal/{goal_id}", headers={"If-None-Match": etag})
+
+    assert 403 == response.status_code
+
+    response = await ac.post(
+        f"/target?goal_id={goal_id}",
+        cookies=cookies,
+        json={"title": "new", "target": 5, "progress": 0},
+    )
+    assert 201 == response.status_code
+
+    response = await ac.get(f"/goal/{goal_id}", cookies=cookies, headers={"If-None-Match": etag})
+
+    assert 200 == response.status_code
+    assert etag != response.headers["etag"]
+    assert ["test1", "test3", "new"] == [target["title"] for target in response.json()["targets"]]
+
+
+@pytest.mark.asyncio
+async def test_all_goal_read_not_modified(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.get("/goal", cookies=cookies)
+    etag = response.headers["etag"]
+    goal_id = response.json()["goals"][0]["id"]
+
+    response = await ac.get("/goal", cookies=cookies, headers={"If-None-Match": f"W/{etag}"})
+
+    assert 304 == response.status_code
+
+    response = await ac.put(
+        f"/goal/{goal_id}",
+        cookies=cookies,
+        json={"title": "renamed", "description": "test1", "private": True},
+    )
+    assert 200 == response.status_code
+
+    response = await ac.get("/goal", cookies=cookies, headers={"If-None-Match": etag})
+
+    assert 200 == response.status_code
+    assert "renamed" == response.json()["goals"][0]["title"]
+
+
 @pytest.mark.asyncio
 async def test_goal_delete(ac: AsyncClient, session: AsyncSession) -> None:
     from app.models import Goal, User
@@ -224,3 +617,119 @@ async def test_goal_update(ac: AsyncClient, session: AsyncSession) -> None:
     assert goal.title == "updated"
     assert goal.private is False
     assert goal.description == "updated"
+
+
+@pytest.mark.asyncio
+async def test_goal_update_if_match(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    goal_id = goal.id
+    etag = (await ac.get(f"/goal/{goal_id}", cookies=cookies)).headers["etag"]
+
+    response = await ac.put(
+        f"/goal/{goal_id}",
+        cookies=cookies,
+        headers={"If-Match": etag},
+        json={"title": "first", "description": "test1", "private": True},
+    )
+
+    assert 200 == response.status_code
+    assert etag != response.headers["etag"]
+
+    response = await ac.put(
+        f"/goal/{goal_id}",
+        cookies=cookies,
+        headers={"If-Match": etag},
+        json={"title": "second", "description": "test1", "private": True},
+    )
+
+    print(response.content)
+    assert 412 == response.status_code
+
+    response = await ac.get(f"/goal/{goal_id}", cookies=cookies)
+    assert "first" == response.json()["title"]
+
+
+# budgets count the SAVEPOINT and its RELEASE or ROLLBACK that the test session wraps around
+# every transaction, so each read endpoint is one query plus two
+@pytest.mark.asyncio
+async def test_goal_query_budget(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.get("/goal", cookies=cookies)
+    # the first request also loads the user into the user cache
+    assert query_count(response) <= 6
+
+    response = await ac.get("/goal", cookies=cookies)
+    assert query_count(response) <= 3
+    goal_id = response.json()["goals"][0]["id"]
+
+    response = await ac.get(f"/goal/{goal_id}", cookies=cookies)
+    assert query_count(response) <= 3
+
+    response = await ac.get("/goal/public")
+    assert query_count(response) <= 3
+
+    response = await ac.get("/goal/public")
+    assert query_count(response) == 0
+
+    response = await ac.post(
+        "/goal",
+        cookies=cookies,
+        json={
+            "title": "test4",
+            "description": "test4",
+            "private": True,
+            "targets": [{"title": "target_test4", "target": 5, "progress": 2}],
+        },
+    )
+    assert 201 == response.status_code
+    assert query_count(response) <= 4
+
+    response = await ac.put(
+        f"/goal/{goal_id}",
+        cookies=cookies,
+        json={"title": "renamed", "description": "test1", "private": True},
+    )
+    assert 200 == response.status_code
+    assert query_count(response) <= 7
+
+
+@pytest.mark.asyncio
+async def test_goal_read_queries_do_not_grow_with_rows(
+    ac: AsyncClient, session: AsyncSession
+) -> None:
+    from app.models import Goal, Target, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    await ac.get("/goal", cookies=cookies)
+
+    paths = ["/goal?limit=50", "/goal/public?limit=50"]
+    before = [query_count(await ac.get(path, cookies=cookies)) for path in paths]
+
+    goals = [
+        Goal(title=f"goal{n}", description="", private=bool(n % 2), user_id=user.id)
+        for n in range(20)
+    ]
+    session.add_all(goals)
+    await session.flush()
+    session.add_all(
+        [Target(title=f"target{n}", target=5, goal_id=goal.id) for goal in goals for n in range(3)]
+    )
+    await session.commit()
+    await public_goals_cache.invalidate()
+
+    after = [query_count(await ac.get(path, cookies=cookies)) for path in paths]
+
+    assert before == after
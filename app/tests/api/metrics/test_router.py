@@ -0,0 +1,33 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.user.security import get_password_hash
+
+
+async def setup_data(session: AsyncSession) -> None:
+    from app.models import User
+
+    user1 = User(email="test1@gmail.com", username="test1", password=get_password_hash("Testtest1"))
+    session.add_all([user1])
+
+    await session.flush()
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_metrics_user_cache(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    before = (await ac.get("/metrics")).json()["user_cache"]
+    await ac.get("/user/test1")
+    await ac.get("/user/test1")
+    response = await ac.get("/metrics")
+
+    print(response.content)
+    assert 200 == response.status_code
+    after = response.json()["user_cache"]
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+    assert after["size"] == 1
+    assert {"size", "checked_out", "overflow", "wait_ms"} <= response.json()["database_pool"].keys()
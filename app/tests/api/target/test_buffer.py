@@ -0,0 +1,124 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator
+
+import pytest
+
+from app.api.target.buffer import ProgressBuffer
+from app.models import Target
+
+
+class FakeSessionFactory:
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[None]:
+        yield None
+
+
+class SlowIncrements:
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.started = asyncio.Event()
+        self.calls: list[list[tuple[int, int, int]]] = []
+
+    async def __call__(self, session: Any, deltas: list[tuple[int, int, int]]) -> list[Any]:
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.calls.append(deltas)
+        return [SimpleNamespace(id=target_id, private=True) for target_id, _, _ in deltas]
+
+
+def create_buffer(**kwargs: Any) -> ProgressBuffer:
+    return ProgressBuffer(FakeSessionFactory(), **kwargs)  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_running_flush(monkeypatch: pytest.MonkeyPatch) -> None:
+    increments = SlowIncrements(delay=0.2)
+    monkeypatch.setattr(Target, "increment_progress_many", increments)
+    buffer = create_buffer(flush_interval=0.01, max_entries=100)
+    buffer.add(1, 1, 2)
+    buffer.add(2, 1, 3)
+
+    buffer.start()
+    await increments.started.wait()
+    await buffer.stop()
+
+    assert [[(1, 1, 2), (2, 1, 3)]] == increments.calls
+    stats = buffer.stats()
+    assert 0 == stats["size"]
+    assert 2 == stats["flushed_rows"]
+
+
+@pytest.mark.asyncio
+async def test_flush_in_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    increments = SlowIncrements()
+    monkeypatch.setattr(Target, "increment_progress_many", increments)
+    buffer = create_buffer(flush_interval=60, max_entries=100, chunk_size=2)
+    for target_id in range(5):
+        buffer.add(target_id, 1, 1)
+
+    await buffer.flush()
+
+    assert [2, 2, 1] == [len(chunk) for chunk in increments.calls]
+    assert 3 == buffer.stats()["flushes"]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_deltas(monkeypatch: pytest.MonkeyPatch) -> None:
+    increments = SlowIncrements(fail=True)
+    monkeypatch.setattr(Target, "increment_progress_many", increments)
+    buffer = create_buffer(flush_interval=60, max_entries=100, chunk_size=2)
+    for target_id in range(3):
+        buffer.add(target_id, 1, 1)
+
+    await buffer.flush()
+    buffer.add(0, 1, 4)
+
+    stats = buffer.stats()
+    assert 3 == stats["size"]
+    assert 1 == stats["failures"]
+
+    increments.fail = False
+    await buffer.flush()
+
+    assert [(0, 1, 5), (1, 1, 1)] == increments.calls[0]
+
+
+@pytest.mark.asyncio
+async def test_add_schedules_one_flush_at_a_time(monkeypatch: pytest.MonkeyPatch) -> None:
+    increments = SlowIncrements(delay=60)
+    monkeypatch.setattr(Target, "increment_progress_many", increments)
+    buffer = create_buffer(flush_interval=60, max_entries=2)
+    flushes = []
+    flush = buffer.flush
+
+    async def counting_flush() -> None:
+        flushes.append(1)
+        await flush()
+
+    monkeypatch.setattr(buffer, "flush", counting_flush)
+    buffer.add(1, 1, 1)
+    buffer.add(2, 1, 1)
+    await increments.started.wait()
+
+    flush_task = buffer._flush_task
+    for target_id in range(3, 100):
+        buffer.add(target_id, 1, 1)
+    await asyncio.sleep(0)
+
+    assert flush_task is buffer._flush_task
+    assert buffer.flush_pending()
+    assert 1 == len(flushes)
+
+    increments.delay = 0
+    assert flush_task
+    flush_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush_task
+    assert 99 == buffer.stats()["size"]
+    await buffer.stop()
+    assert 0 == buffer.stats()["size"]
@@ -1,10 +1,11 @@
 import pytest
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.api.goal.cache import public_goals_cache
 from app.api.user.jwt import create_access_token
 from app.api.user.security import get_password_hash
-from app.tests.utils import ID_STRING
+from app.tests.utils import ID_STRING, query_count
 
 
 async def setup_data(session: AsyncSession) -> None:
@@ -76,6 +77,47 @@ async def test_target_delete(ac: AsyncClient, session: AsyncSession) -> None:
     assert targets_count - 1 == len(goal.targets)
 
 
+@pytest.mark.asyncio
+async def test_target_update_if_match(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    goal_id, target_id = goal.id, goal.targets[0].id
+
+    response = await ac.put(
+        f"target/{target_id}?goal_id={goal_id}",
+        cookies=cookies,
+        json={"title": "first", "target": 7, "progress": 1},
+    )
+    etag = response.headers["etag"]
+
+    response = await ac.post(f"/target/{target_id}/increment", cookies=cookies, json={"delta": 1})
+    assert 200 == response.status_code
+
+    response = await ac.put(
+        f"target/{target_id}?goal_id={goal_id}",
+        cookies=cookies,
+        headers={"If-Match": etag},
+        json={"title": "second", "target": 7, "progress": 1},
+    )
+
+    print(response.content)
+    assert 412 == response.status_code
+
+    response = await ac.put(
+        f"target/{target_id}?goal_id={goal_id}",
+        cookies=cookies,
+        headers={"If-Match": f'W/{etag}, {etag[:-1]}.0"'},
+        json={"title": "second", "target": 7, "progress": 1},
+    )
+    assert 412 == response.status_code
+
+
 @pytest.mark.asyncio
 async def test_target_update(ac: AsyncClient, session: AsyncSession) -> None:
     from app.models import Goal, User
@@ -106,3 +148,293 @@ async def test_target_update(ac: AsyncClient, session: AsyncSession) -> None:
     assert target.title == "test_update"
     assert target.target == 222
     assert target.progress == 222
+
+
+@pytest.mark.asyncio
+async def test_target_update_and_delete_errors(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    goal_id, target_id = goal.id, goal.targets[0].id
+    data = {"title": "test_update", "target": 7, "progress": 1}
+
+    response = await ac.put(f"target/0?goal_id={goal_id}", cookies=cookies, json=data)
+    assert 404 == response.status_code
+
+    response = await ac.put(f"target/{target_id}?goal_id=0", cookies=cookies, json=data)
+    assert 404 == response.status_code
+
+    response = await ac.delete(f"target/0?goal_id={goal_id}", cookies=cookies)
+    assert 404 == response.status_code
+
+    other_cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test2'})}"}
+    other_user = User(
+        email="test2@gmail.com", username="test2", password=get_password_hash("Testtest1")
+    )
+    session.add(other_user)
+    await session.commit()
+
+    response = await ac.put(
+        f"target/{target_id}?goal_id={goal_id}", cookies=other_cookies, json=data
+    )
+    assert 403 == response.status_code
+
+    response = await ac.delete(f"target/{target_id}?goal_id={goal_id}", cookies=other_cookies)
+    assert 403 == response.status_code
+
+
+@pytest.mark.asyncio
+async def test_targets_progress_update(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, Target, User
+
+    await setup_data(session)
+
+    other_user = User(
+        email="test2@gmail.com", username="test2", password=get_password_hash("Testtest1")
+    )
+    session.add(other_user)
+    await session.flush()
+    other_goal = Goal(title="test2", description="test2", private=True, user_id=other_user.id)
+    session.add(other_goal)
+    await session.flush()
+    other_target = Target(title="other", target=10, goal_id=other_goal.id)
+    session.add(other_target)
+    await session.flush()
+    other_target_id = other_target.id
+    await session.commit()
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    target1, target2 = goal.targets
+
+    response = await ac.patch(
+        "/target/progress",
+        cookies=cookies,
+        json=[
+            {"id": target1.id, "progress": 5},
+            {"id": target2.id, "progress": 4},
+            {"id": other_target_id, "progress": 1},
+        ],
+    )
+
+    print(response.content)
+    assert 200 == response.status_code
+    expected = {
+        "targets": [{"title": "test1", "target": 7, "progress": 5, "id": target1.id}],
+        "not_updated": [target2.id, other_target_id],
+    }
+    assert expected == response.json()
+
+    await session.refresh(target1)
+    await session.refresh(target2)
+    await session.refresh(other_target)
+    assert target1.progress == 5
+    assert target2.progress == 0
+    assert other_target.progress == 0
+
+
+@pytest.mark.asyncio
+async def test_target_increment(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    target = goal.targets[0]
+
+    response = await ac.post(f"/target/{target.id}/increment", cookies=cookies, json={"delta": 3})
+    assert 200 == response.status_code
+    assert {"title": "test1", "target": 7, "progress": 3, "id": target.id} == response.json()
+
+    response = await ac.post(f"/target/{target.id}/increment", cookies=cookies, json={"delta": 10})
+    assert 200 == response.status_code
+    assert 7 == response.json()["progress"]
+
+    response = await ac.post(
+        f"/target/{target.id}/increment", cookies=cookies, json={"delta": -10, "clamp": True}
+    )
+    assert 200 == response.status_code
+    assert 0 == response.json()["progress"]
+
+    await session.refresh(target)
+    assert target.progress == 0
+
+
+@pytest.mark.asyncio
+async def test_target_increment_errors(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    target_id = goal.targets[0].id
+
+    response = await ac.post(
+        f"/target/{target_id}/increment", cookies=cookies, json={"delta": 10, "clamp": False}
+    )
+    assert 400 == response.status_code
+
+    other_cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test2'})}"}
+    other_user = User(
+        email="test2@gmail.com", username="test2", password=get_password_hash("Testtest1")
+    )
+    session.add(other_user)
+    await session.commit()
+    response = await ac.post(
+        f"/target/{target_id}/increment", cookies=other_cookies, json={"delta": 1}
+    )
+    assert 403 == response.status_code
+
+    response = await ac.post("/target/0/increment", cookies=cookies, json={"delta": 1})
+    assert 404 == response.status_code
+
+
+@pytest.mark.asyncio
+async def test_target_increment_buffered(
+    ac: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.api.target import models
+    from app.api.target.buffer import ProgressBuffer
+    from app.config import settings
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    buffer = ProgressBuffer(
+        async_sessionmaker(bind=session.bind), flush_interval=60, max_entries=100
+    )
+    monkeypatch.setattr(settings, "PROGRESS_BUFFER_ENABLED", True)
+    monkeypatch.setattr(models, "progress_buffer", buffer)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    target = goal.targets[0]
+
+    for delta in (2, 3):
+        response = await ac.post(
+            f"/target/{target.id}/increment", cookies=cookies, json={"delta": delta}
+        )
+        assert 202 == response.status_code
+    assert 1 == buffer.stats()["size"]
+
+    response = await ac.post(
+        f"/target/{target.id}/increment", cookies=cookies, json={"delta": 1, "clamp": False}
+    )
+    assert 422 == response.status_code
+    assert 1 == buffer.stats()["size"]
+
+    await buffer.stop()
+
+    stats = buffer.stats()
+    assert stats["size"] == 0
+    assert stats["flushes"] == 1
+    assert stats["flushed_rows"] == 1
+    await session.refresh(target)
+    assert target.progress == 5
+
+
+# budgets include the SAVEPOINT and RELEASE the test session wraps around every transaction
+@pytest.mark.asyncio
+async def test_target_query_budget(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.models import Goal, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goal = [gl async for gl in Goal.read_user_goals(session, user_id=user.id, limit=1, offset=0)][0]
+    goal_id = goal.id
+    await ac.get("/goal", cookies=cookies)
+
+    response = await ac.post(
+        f"/target?goal_id={goal_id}",
+        cookies=cookies,
+        json={"title": "new", "target": 5, "progress": 0},
+    )
+    assert 201 == response.status_code
+    assert query_count(response) <= 6
+    target_id = response.json()["id"]
+
+    response = await ac.put(
+        f"/target/{target_id}?goal_id={goal_id}",
+        cookies=cookies,
+        json={"title": "new", "target": 5, "progress": 1},
+    )
+    assert 200 == response.status_code
+    assert query_count(response) <= 3
+
+    response = await ac.post(f"/target/{target_id}/increment", cookies=cookies, json={"delta": 1})
+    assert 200 == response.status_code
+    assert query_count(response) <= 3
+
+    response = await ac.delete(f"/target/{target_id}?goal_id={goal_id}", cookies=cookies)
+    assert 204 == response.status_code
+    assert query_count(response) <= 3
+
+
+@pytest.mark.asyncio
+async def test_target_progress_invalidates_feed_only_for_public_goals(
+    ac: AsyncClient, session: AsyncSession
+) -> None:
+    from app.models import Goal, Target, User
+
+    await setup_data(session)
+
+    user = await User.read_by_username(session, "test1")
+    assert user
+    user_id = user.id
+    public_goal = Goal(title="public", description="", private=False, user_id=user_id)
+    session.add(public_goal)
+    await session.flush()
+    public_target = Target(title="public", target=10, goal_id=public_goal.id)
+    session.add(public_target)
+    await session.flush()
+    public_target_id = public_target.id
+    await session.commit()
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    goals = [gl async for gl in Goal.read_user_goals(session, user_id=user_id, limit=2, offset=0)]
+    private_target_id = next(gl for gl in goals if gl.private).targets[0].id
+
+    invalidations = public_goals_cache.invalidations
+    response = await ac.post(
+        f"/target/{private_target_id}/increment", cookies=cookies, json={"delta": 1}
+    )
+    assert 200 == response.status_code
+    response = await ac.patch(
+        "/target/progress", cookies=cookies, json=[{"id": private_target_id, "progress": 2}]
+    )
+    assert 200 == response.status_code
+    assert invalidations == public_goals_cache.invalidations
+
+    response = await ac.post(
+        f"/target/{public_target_id}/increment", cookies=cookies, json={"delta": 1}
+    )
+    assert 200 == response.status_code
+    assert invalidations + 1 == public_goals_cache.invalidations
+
+    response = await ac.patch(
+        "/target/progress",
+        cookies=cookies,
+        json=[
+            {"id": private_target_id, "progress": 3},
+            {"id": public_target_id, "progress": 2},
+        ],
+    )
+    assert 200 == response.status_code
+    assert invalidations + 2 == public_goals_cache.invalidations
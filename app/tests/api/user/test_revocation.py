@@ -0,0 +1,60 @@
+from typing import Any, AsyncIterator
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.user.revocation import RedisRevocationBackend
+from app.config import Settings
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+        self.ttls: dict[str, int] = {}
+
+    async def set(self, name: str, value: Any, ex: int | None = None) -> None:
+        self.values[name] = value
+        if ex is not None:
+            self.ttls[name] = ex
+
+    async def exists(self, *names: str) -> int:
+        return sum(name in self.values for name in names)
+
+    async def scan_iter(self, match: str) -> AsyncIterator[str]:
+        prefix = match.rstrip("*")
+        for name in list(self.values):
+            if name.startswith(prefix):
+                yield name
+
+    async def delete(self, *names: str) -> None:
+        for name in names:
+            self.values.pop(name, None)
+
+
+@pytest.mark.asyncio
+async def test_redis_revocations_shared_between_workers() -> None:
+    client = FakeRedis()
+    worker1 = RedisRevocationBackend(client, ttl=600)
+    worker2 = RedisRevocationBackend(client, ttl=600)
+    client.values["other"] = 1
+
+    await worker1.revoke(7)
+
+    assert await worker2.is_revoked(7)
+    assert not await worker2.is_revoked(8)
+    assert 600 == client.ttls["token:revoked:7"]
+
+    await worker2.clear()
+
+    assert not await worker1.is_revoked(7)
+    assert {"other": 1} == client.values
+
+
+def test_stateless_requires_shared_revocations() -> None:
+    with pytest.raises(ValidationError):
+        Settings(JWT_STATELESS=True, JWT_REVOCATION_REDIS_URL="")  # type: ignore
+
+    settings = Settings(
+        JWT_STATELESS=True, JWT_REVOCATION_REDIS_URL="redis://localhost:6379/0"
+    )  # type: ignore
+    assert settings.JWT_STATELESS
@@ -41,6 +41,54 @@ async def test_user_create(ac: AsyncClient, session: AsyncSession) -> None:
     assert user.username == "test3"
 
 
+@pytest.mark.asyncio
+async def test_user_create_taken_skips_hashing(ac: AsyncClient, session: AsyncSession) -> None:
+    from app.api.user.security import password_hasher
+
+    await setup_data(session)
+    completed = password_hasher.completed
+
+    response = await ac.post(
+        "/user", json={"email": "test1@gmail.com", "username": "new", "password": "Testtest1"}
+    )
+    assert 400 == response.status_code
+    assert "Email is already taken" == response.json()["detail"]
+
+    response = await ac.post(
+        "/user", json={"email": "new@gmail.com", "username": "test2", "password": "Testtest1"}
+    )
+    assert 400 == response.status_code
+    assert "Username is already taken" == response.json()["detail"]
+    assert completed == password_hasher.completed
+
+
+@pytest.mark.asyncio
+async def test_user_create_race(
+    ac: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.models import User
+
+    await setup_data(session)
+    read_by_email_or_username = User.read_by_email_or_username
+    checks = []
+
+    async def miss_first_check(session: AsyncSession, email: str, username: str) -> User | None:
+        # the first check runs before a concurrent request registers the same username
+        checks.append(username)
+        if len(checks) == 1:
+            return None
+        return await read_by_email_or_username(session, email, username)
+
+    monkeypatch.setattr(User, "read_by_email_or_username", miss_first_check)
+    response = await ac.post(
+        "/user", json={"email": "new@gmail.com", "username": "test1", "password": "Testtest1"}
+    )
+
+    assert 400 == response.status_code
+    assert "Username is already taken" == response.json()["detail"]
+    assert 2 == len(checks)
+
+
 @pytest.mark.asyncio
 async def test_user_read(ac: AsyncClient, session: AsyncSession) -> None:
     await setup_data(session)
@@ -103,6 +151,91 @@ async def test_user_delete(ac: AsyncClient, session: AsyncSession) -> None:
     assert await User.read_by_username(session, "test1") is None
 
 
+@pytest.mark.asyncio
+async def test_user_delete_invalidates_cache(ac: AsyncClient, session: AsyncSession) -> None:
+    await setup_data(session)
+
+    response = await ac.get("user/test1")
+    assert 200 == response.status_code
+
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.delete("/user", cookies=cookies)
+    assert 204 == response.status_code
+
+    response = await ac.get("user/test1")
+    assert 404 == response.status_code
+
+
+@pytest.mark.asyncio
+async def test_user_cache_skips_user_invalidated_during_read(
+    ac: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.api.user.cache import user_cache
+    from app.models import User
+
+    await setup_data(session)
+    read_by_username = User.read_by_username
+
+    async def read_then_invalidate(session: AsyncSession, username: str) -> User | None:
+        user = await read_by_username(session, username)
+        # a DeleteUser that commits while the read is in flight
+        user_cache.invalidate(username)
+        return user
+
+    monkeypatch.setattr(User, "read_by_username", read_then_invalidate)
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+    response = await ac.get("/user", cookies=cookies)
+
+    assert 200 == response.status_code
+    assert user_cache.get("test1") is None
+
+
+@pytest.mark.asyncio
+async def test_user_current_stateless(
+    ac: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "JWT_STATELESS", True)
+
+    token = create_access_token(data={"sub": "ghost", "uid": 42, "email": "ghost@gmail.com"})
+    response = await ac.get("/user", cookies={"access_token": f"Bearer {token}"})
+
+    print(response.content)
+
+    assert 200 == response.status_code
+    expected = {"id": 42, "email": "ghost@gmail.com", "username": "ghost"}
+    assert response.json() == expected
+
+
+@pytest.mark.asyncio
+async def test_user_current_stateless_wrong_epoch(
+    ac: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "JWT_STATELESS", True)
+
+    token = create_access_token(data={"sub": "ghost", "uid": 42, "email": "ghost@gmail.com"})
+    monkeypatch.setattr(settings, "JWT_EPOCH", settings.JWT_EPOCH + 1)
+    response = await ac.get("/user", cookies={"access_token": f"Bearer {token}"})
+
+    assert 401 == response.status_code
+
+
+@pytest.mark.asyncio
+async def test_user_delete_revokes_stateless_token(
+    ac: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "JWT_STATELESS", True)
+    await setup_data(session)
+
+    response = await ac.post("/user/token", data={"username": "test1", "password": "Testtest1"})
+    cookies = {"access_token": f"Bearer {response.json()['access_token']}"}
+
+    response = await ac.delete("/user", cookies=cookies)
+    assert 204 == response.status_code
+
+    response = await ac.get("/user", cookies=cookies)
+    assert 401 == response.status_code
+
+
 @pytest.mark.asyncio
 async def test_user_logout(ac: AsyncClient, session: AsyncSession) -> None:
     cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
@@ -0,0 +1,22 @@
+import asyncio
+
+import pytest
+
+from app.api.user.security import PasswordHasher, verify_password
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_runs_on_pool() -> None:
+    hasher = PasswordHasher(workers=2)
+
+    hashes = await asyncio.gather(*[hasher.hash("Testtest1") for _ in range(4)])
+
+    assert all(verify_password("Testtest1", password_hash) for password_hash in hashes)
+    assert await hasher.verify("Testtest1", hashes[0])
+    assert not await hasher.verify("Wrongpass1", hashes[0])
+    stats = hasher.stats()
+    assert stats["completed"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 0
+    assert stats["max_in_flight"] == 4
+    hasher.shutdown()
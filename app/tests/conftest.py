@@ -4,11 +4,14 @@ import pytest
 from httpx import AsyncClient
 from sqlalchemy import create_engine, event, text
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncConnection, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, SessionTransaction
 
+from app.api.goal.cache import public_goals_cache
+from app.api.user.cache import user_cache
+from app.api.user.revocation import token_revocations
 from app.config import settings
-from app.database.db import get_session
+from app.database.db import RequestSessions, get_session
 from app.main import app
 from app.models.base import Base
 
@@ -21,6 +24,19 @@ async def ac() -> AsyncGenerator:
         yield c
 
 
+@pytest.fixture(autouse=True)
+async def reset_auth_state() -> AsyncGenerator:
+    yield
+    await token_revocations.clear()
+    user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+async def reset_public_goals_cache() -> AsyncGenerator:
+    yield
+    await public_goals_cache.invalidate()
+
+
 @pytest.fixture(scope="session")
 def setup_db() -> Generator:
     engine = create_engine(DATABASE_URL.replace("+asyncpg", ""))
@@ -60,6 +76,21 @@ def setup_test_db(setup_db: Generator) -> Generator:
         Base.metadata.drop_all(engine)
 
 
+# app sessions join the test's outer transaction; the connection belongs to the fixture, so
+# releasing it only drops the reference
+class TestRequestSessions(RequestSessions):
+    def __init__(self, connection: AsyncConnection) -> None:
+        super().__init__(connection.engine)
+        self.test_connection = connection
+
+    async def connect(self) -> AsyncConnection:
+        self.connection = self.test_connection
+        return self.connection
+
+    async def close(self) -> None:
+        self.connection = None
+
+
 @pytest.fixture
 async def session() -> AsyncGenerator:
     async_engine = create_async_engine(f"{DATABASE_URL}/test")
@@ -83,11 +114,14 @@ async def session() -> AsyncGenerator:
                 if conn.sync_connection:
                     conn.sync_connection.begin_nested()
 
-        def test_get_session() -> Generator:
+        async def test_get_session() -> AsyncGenerator:
+            sessions = TestRequestSessions(conn)
             try:
-                yield AsyncSessionLocal
+                yield sessions
             except SQLAlchemyError:
                 pass
+            finally:
+                await sessions.close()
 
         app.dependency_overrides[get_session] = test_get_session
 
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.db import RequestSessions
+from app.database.pool import InstrumentedPool
+from app.tests.conftest import DATABASE_URL
+
+
+@pytest.mark.asyncio
+async def test_request_sessions_share_one_connection() -> None:
+    engine = create_async_engine(f"{DATABASE_URL}/test", poolclass=InstrumentedPool)
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, InstrumentedPool)
+    sessions = RequestSessions(engine)
+
+    async with sessions() as session:
+        backend_pid = await session.scalar(text("select pg_backend_pid()"))
+    async with sessions.begin() as session:
+        assert backend_pid == await session.scalar(text("select pg_backend_pid()"))
+    async with sessions() as session:
+        assert not session.in_transaction()
+        await session.execute(text("select 1"))
+
+    assert 1 == pool.stats()["checked_out"]
+    await sessions.close()
+    stats = pool.stats()
+    await engine.dispose()
+
+    assert 0 == stats["checked_out"]
+    assert 1 == stats["wait_ms"]["count"]
+
+
+@pytest.mark.asyncio
+async def test_request_sessions_without_queries_dont_connect() -> None:
+    engine = create_async_engine(f"{DATABASE_URL}/test", poolclass=InstrumentedPool)
+    sessions = RequestSessions(engine)
+
+    await sessions.close()
+    stats = engine.sync_engine.pool.stats()  # type: ignore
+    await engine.dispose()
+
+    assert 0 == stats["wait_ms"]["count"]
+
+
+@pytest.mark.asyncio
+async def test_request_sessions_release() -> None:
+    engine = create_async_engine(f"{DATABASE_URL}/test", poolclass=InstrumentedPool)
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, InstrumentedPool)
+    sessions = RequestSessions(engine)
+
+    async with sessions() as session:
+        await session.execute(text("select 1"))
+        await sessions.release()
+        # a session is still open on the connection, so it is kept
+        assert 1 == pool.stats()["checked_out"]
+    await sessions.release()
+    released = pool.stats()["checked_out"]
+
+    async with sessions() as session:
+        await session.execute(text("select 1"))
+    await sessions.close()
+    stats = pool.stats()
+    await engine.dispose()
+
+    assert 0 == released
+    assert 2 == stats["wait_ms"]["count"]
@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.user.jwt import create_access_token
+from app.api.user.security import get_password_hash
+from app.config import settings
+from app.database.instrumentation import QueryStats
+from app.tests.utils import query_count
+
+
+def test_server_timing() -> None:
+    stats = QueryStats(count=3, duration=0.0125)
+
+    assert 'db;dur=12.50;desc="3 queries"' == stats.server_timing()
+
+
+@pytest.mark.asyncio
+async def test_query_timing_without_queries(ac: AsyncClient) -> None:
+    response = await ac.get("/")
+
+    assert 0 == query_count(response)
+
+
+@pytest.mark.asyncio
+async def test_query_timing_logs_request(
+    ac: AsyncClient,
+    session: AsyncSession,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.models import User
+
+    session.add(
+        User(email="test1@gmail.com", username="test1", password=get_password_hash("Testtest1"))
+    )
+    await session.commit()
+    cookies = {"access_token": f"Bearer {create_access_token(data={'sub': 'test1'})}"}
+
+    with caplog.at_level(logging.INFO, logger="app.database.instrumentation"):
+        response = await ac.get("/goal", cookies=cookies)
+
+    assert 200 == response.status_code
+    record = caplog.records[-1]
+    assert logging.INFO == record.levelno
+    assert "/goal" == record.__dict__["path"]
+    assert 200 == record.__dict__["status_code"]
+    assert query_count(response) == record.__dict__["db_queries"] > 0
+
+    monkeypatch.setattr(settings, "DB_QUERY_WARN_COUNT", 1)
+    with caplog.at_level(logging.INFO, logger="app.database.instrumentation"):
+        await ac.get("/goal", cookies=cookies)
+
+    assert logging.WARNING == caplog.records[-1].levelno
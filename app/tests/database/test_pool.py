@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.pool import Histogram, InstrumentedPool
+from app.tests.conftest import DATABASE_URL
+
+
+def test_histogram_buckets() -> None:
+    histogram = Histogram((1.0, 10.0))
+
+    for value in (0.5, 1.0, 3.0, 50.0):
+        histogram.observe(value)
+
+    assert {
+        "buckets": {"le_1": 2, "le_10": 1, "le_inf": 1},
+        "count": 4,
+        "sum": 54.5,
+        "max": 50.0,
+    } == histogram.stats()
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_stats() -> None:
+    engine = create_async_engine(
+        f"{DATABASE_URL}/test",
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, InstrumentedPool)
+
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+        assert 1 == pool.stats()["checked_out"]
+
+        with pytest.raises(TimeoutError):
+            async with engine.connect():
+                pass
+
+    stats = pool.stats()
+    await engine.dispose()
+
+    assert 0 == stats["checked_out"]
+    assert 1 == stats["checked_in"]
+    assert 1 == stats["timeouts"]
+    assert 2 == stats["wait_ms"]["count"]
+    assert stats["wait_ms"]["max"] >= 100
@@ -0,0 +1,69 @@
+from app.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_entries() -> None:
+    timer = FakeTimer()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=5, timer=timer)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    timer.now = 5
+    assert cache.get("a") is None
+    assert {"size": 0, "maxsize": 10, "hits": 1, "misses": 1, "evictions": 0} == cache.stats()
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_invalidate() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.invalidate("a")
+
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_skips_values_read_before_invalidation() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+
+    generation = cache.generation
+    cache.invalidate("a")
+    cache.set("a", 1, generation)
+    assert cache.get("a") is None
+
+    cache.set("a", 2, cache.generation)
+    assert cache.get("a") == 2
+
+
+def test_ttl_cache_invalidated_within() -> None:
+    timer = FakeTimer()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60, timer=timer)
+    assert not cache.invalidated_within(5)
+
+    cache.invalidate("a")
+    timer.now = 4
+    assert cache.invalidated_within(5)
+
+    timer.now = 5
+    assert not cache.invalidated_within(5)
@@ -0,0 +1,55 @@
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.base import Base
+from app.tests.conftest import DATABASE_URL
+
+MIGRATIONS_DIR = Path(__file__).parents[1] / "database" / "migrations"
+SERVER_URL = DATABASE_URL.replace("+asyncpg", "")
+
+
+def drop_database(name: str) -> None:
+    engine = create_engine(SERVER_URL, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        try:
+            conn.execute(text(f"drop database {name}"))
+        except SQLAlchemyError:
+            pass
+    engine.dispose()
+
+
+@pytest.fixture
+def migrated_db() -> Generator:
+    drop_database("test_migrations")
+    engine = create_engine(SERVER_URL, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        conn.execute(text("create database test_migrations"))
+    engine.dispose()
+
+    url = f"{SERVER_URL}/test_migrations"
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    command.upgrade(config, "head")
+
+    yield url
+
+    drop_database("test_migrations")
+
+
+def test_migrations_match_model_indexes(migrated_db: str) -> None:
+    engine = create_engine(migrated_db)
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    engine.dispose()
+
+    index_diff = [op for op in diff if op[0] in ("add_index", "remove_index")]
+    assert index_diff == []
@@ -1,3 +1,14 @@
+import re
+
 from eqassertions import IsA  # type: ignore
+from httpx import Response
 
 ID_STRING = IsA(int)
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+# SQL statements the app issued for the request, from its Server-Timing header
+def query_count(response: Response) -> int:
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+    assert match, f"no query count in {response.headers.get('server-timing')!r}"
+    return int(match.group(1))
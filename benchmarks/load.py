@@ -0,0 +1,362 @@
+"""Load test for the API: seed a database, drive real endpoints, report latency and queries.
+
+Seeds a dedicated database (dropped and recreated on every run) with users, goals and
+targets, then runs each scenario at a fixed concurrency against the app in-process, or
+against a running server with --url (point that server at the same database first).
+
+    $ python -m benchmarks.load --users 50 --goals 20 --targets 5 --requests 1000
+    $ python -m benchmarks.load --save-baseline main
+    $ python -m benchmarks.load --compare main
+
+Queries per request are read from the Server-Timing header every response carries.
+Baselines are JSON files under benchmarks/baselines/. --compare exits with status 1 when
+a scenario's p95 latency grows by more than --threshold or it issues more queries per
+request than the baseline did, and refuses to run with options other than the baseline's.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from httpx import AsyncClient, Response
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+PASSWORD = "Benchmark1"
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+@dataclass
+class User:
+    id: int
+    username: str
+    goal_ids: list[int] = field(default_factory=list)
+    target_ids: list[tuple[int, int]] = field(default_factory=list)
+
+
+@dataclass
+class Result:
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    queries_per_request: float | None
+
+
+Scenario = Callable[[AsyncClient, User, random.Random], Awaitable[Response]]
+
+
+async def token(client: AsyncClient, user: User, rnd: random.Random) -> Response:
+    return await client.post("/user/token", data={"username": user.username, "password": PASSWORD})
+
+
+async def user_goals(client: AsyncClient, user: User, rnd: random.Random) -> Response:
+    return await client.get("/goal", params={"limit": 20})
+
+
+async def public_goals(client: AsyncClient, user: User, rnd: random.Random) -> Response:
+    return await client.get("/goal/public", params={"limit": 20, "offset": rnd.randrange(5) * 20})
+
+
+async def goal_by_id(client: AsyncClient, user: User, rnd: random.Random) -> Response:
+    return await client.get(f"/goal/{rnd.choice(user.goal_ids)}")
+
+
+async def target_update(client: AsyncClient, user: User, rnd: random.Random) -> Response:
+    goal_id, target_id = rnd.choice(user.target_ids)
+    return await client.put(
+        f"/target/{target_id}",
+        params={"goal_id": goal_id},
+        json={"title": "benchmark", "target": 100, "progress": rnd.randrange(100)},
+    )
+
+
+async def target_increment(client: AsyncClient, user: User, rnd: random.Random) -> Response:
+    _, target_id = rnd.choice(user.target_ids)
+    return await client.post(f"/target/{target_id}/increment", json={"delta": 1})
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "token": token,
+    "user_goals": user_goals,
+    "public_goals": public_goals,
+    "goal_by_id": goal_by_id,
+    "target_update": target_update,
+    "target_increment": target_increment,
+}
+
+
+def server_url() -> str:
+    from app.config import settings
+
+    return (
+        f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
+        f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}"
+    )
+
+
+def seed(database: str, users: int, goals: int, targets: int, public_ratio: float) -> list[User]:
+    from sqlalchemy import create_engine, insert, text
+
+    from app.api.user.security import get_password_hash
+    from app.models import Goal, Target
+    from app.models import User as UserModel
+    from app.models.base import Base
+
+    engine = create_engine(server_url(), isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        conn.execute(text(f"drop database if exists {database}"))
+        conn.execute(text(f"create database {database}"))
+    engine.dispose()
+
+    rnd = random.Random(0)
+    password = get_password_hash(PASSWORD)
+    engine = create_engine(f"{server_url()}/{database}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        user_rows = conn.execute(
+            insert(UserModel).returning(UserModel.id, UserModel.username),
+            [
+                {"email": f"bench{n}@example.com", "username": f"bench{n}", "password": password}
+                for n in range(users)
+            ],
+        ).all()
+        seeded = {row.id: User(row.id, row.username) for row in user_rows}
+
+        goal_rows = conn.execute(
+            insert(Goal).returning(Goal.id, Goal.user_id),
+            [
+                {
+                    "title": f"goal {n}",
+                    "description": "benchmark goal",
+                    "private": rnd.random() >= public_ratio,
+                    "user_id": user_id,
+                }
+                for user_id in seeded
+                for n in range(goals)
+            ],
+        ).all()
+        for row in goal_rows:
+            seeded[row.user_id].goal_ids.append(row.id)
+
+        if targets:
+            target_rows = conn.execute(
+                insert(Target).returning(Target.id, Target.goal_id),
+                [
+                    {"title": f"target {n}", "target": 100, "progress": 0, "goal_id": row.id}
+                    for row in goal_rows
+                    for n in range(targets)
+                ],
+            ).all()
+            owners = {row.id: row.user_id for row in goal_rows}
+            for row in target_rows:
+                seeded[owners[row.goal_id]].target_ids.append((row.goal_id, row.id))
+    engine.dispose()
+    return list(seeded.values())
+
+
+def percentile(latencies: list[float], n: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+    return statistics.quantiles(latencies, n=100, method="inclusive")[n - 1]
+
+
+def query_count(response: Response) -> int | None:
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else None
+
+
+async def run_scenario(
+    scenario: Scenario, clients: list[tuple[AsyncClient, User]], requests: int
+) -> Result:
+    latencies: list[float] = []
+    queries: list[int | None] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(client: AsyncClient, user: User, rnd: random.Random) -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await scenario(client, user, rnd)
+            latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(query_count(response))
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            worker(client, user, random.Random(index))
+            for index, (client, user) in enumerate(clients)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    counted = [count for count in queries if count is not None]
+    return Result(
+        requests=len(latencies),
+        errors=errors,
+        rps=len(latencies) / elapsed,
+        p50_ms=percentile(latencies, 50),
+        p95_ms=percentile(latencies, 95),
+        p99_ms=percentile(latencies, 99),
+        mean_ms=statistics.fmean(latencies),
+        queries_per_request=statistics.fmean(counted) if counted else None,
+    )
+
+
+async def login(client: AsyncClient, user: User) -> None:
+    response = await token(client, user, random.Random())
+    response.raise_for_status()
+    client.cookies.set("access_token", f"Bearer {response.json()['access_token']}")
+
+
+async def run(args: argparse.Namespace, users: list[User]) -> dict[str, Result]:
+    from app.database.db import async_engine
+    from app.main import app
+
+    client_args: dict[str, Any] = (
+        {"base_url": args.url} if args.url else {"app": app, "base_url": "http://bench"}
+    )
+    clients = [
+        (AsyncClient(**client_args), users[index % len(users)]) for index in range(args.concurrency)
+    ]
+    results = {}
+    try:
+        await asyncio.gather(*(login(client, user) for client, user in clients))
+        for name in args.scenarios:
+            results[name] = await run_scenario(SCENARIOS[name], clients, args.requests)
+    finally:
+        for client, _ in clients:
+            await client.aclose()
+        await async_engine.dispose()
+    return results
+
+
+def run_params(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        name: getattr(args, name)
+        for name in ("users", "goals", "targets", "public_ratio", "concurrency", "requests")
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict[str, Result]) -> None:
+    print(
+        f"{'scenario':<18}{'reqs':>7}{'errors':>8}{'rps':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+    )
+    for name, result in results.items():
+        queries = (
+            f"{result.queries_per_request:.1f}" if result.queries_per_request is not None else "-"
+        )
+        print(
+            f"{name:<18}{result.requests:>7}{result.errors:>8}{result.rps:>9.1f}"
+            f"{result.p50_ms:>9.2f}{result.p95_ms:>9.2f}{result.p99_ms:>9.2f}{queries:>9}"
+        )
+
+
+def compare(results: dict[str, Result], baseline: dict, threshold: float) -> bool:
+    print(f"\ncompared with baseline from commit {baseline.get('commit')}:")
+    regressed = False
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        p95_change = result.p95_ms / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        # the first requests of a run miss the user cache, so compare queries at one decimal
+        queries_before = before["queries_per_request"]
+        queries_after = result.queries_per_request
+        more_queries = (
+            queries_after is not None
+            and queries_before is not None
+            and round(queries_after, 1) > round(queries_before, 1)
+        )
+        slower = p95_change > threshold
+        flag = " REGRESSION" if slower or more_queries else ""
+        regressed = regressed or bool(flag)
+        print(
+            f"{name:<18} p95 {before['p95_ms']:8.2f} -> {result.p95_ms:8.2f} ms ({p95_change:+.0%})"
+            f"  rps {before['rps']:8.1f} -> {result.rps:8.1f}"
+            f"  queries {queries_before} -> {queries_after}{flag}"
+        )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database", default="goal_connect_bench")
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--goals", type=int, default=20, help="goals per user")
+    parser.add_argument("--targets", type=int, default=5, help="targets per goal")
+    parser.add_argument("--public-ratio", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 growth")
+    args = parser.parse_args()
+    if args.targets < 1 and {"target_update", "target_increment"} & set(args.scenarios):
+        parser.error("target scenarios need --targets of at least 1")
+
+    if args.compare:
+        baseline_path = BASELINES_DIR / f"{args.compare}.json"
+        if not baseline_path.exists():
+            parser.error(f"no baseline at {baseline_path}")
+        baseline = json.loads(baseline_path.read_text())
+        # latency and queries per request depend on data volume and concurrency
+        if baseline["params"] != run_params(args):
+            parser.error(
+                f"baseline {args.compare!r} was recorded with {baseline['params']}, "
+                f"this run uses {run_params(args)}; rerun with the same options"
+            )
+
+    # the app reads its settings on import, so point it at the benchmark database first
+    os.environ["POSTGRES_DB"] = args.database
+    users = seed(args.database, args.users, args.goals, args.targets, args.public_ratio)
+    results = asyncio.run(run(args, users))
+    print_results(results)
+
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save_baseline}.json"
+        saved = {
+            "commit": git_commit(),
+            "params": run_params(args),
+            "results": {name: asdict(result) for name, result in results.items()},
+        }
+        path.write_text(json.dumps(saved, indent=2) + "\n")
+        print(f"\nbaseline saved to {path}")
+
+    if args.compare:
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
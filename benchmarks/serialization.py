@@ -0,0 +1,93 @@
+"""CPU cost of rendering a goal page: FastAPI response_model path vs pre-serialized bytes.
+
+Run from the project root with the usual .env in place:
+
+    $ python -m benchmarks.serialization --goals 100 --targets 20
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.api.goal.router import router
+from app.api.goal.schemas import AllGoalsSchemaResponse
+from app.api.goal.utils import goals_page_response
+from app.models import GoalSchema, TargetSchema
+
+
+def build_goals(goals: int, targets: int) -> list[GoalSchema]:
+    return [
+        GoalSchema(
+            id=goal_id,
+            title=f"goal {goal_id}",
+            description="description " * 5,
+            private=False,
+            created_at=datetime.utcnow(),
+            user_id=1,
+            version=1,
+            targets=[
+                TargetSchema(
+                    id=goal_id * targets + target_id,
+                    title=f"target {target_id}",
+                    target=100,
+                    progress=target_id,
+                    goal_id=goal_id,
+                    version=1,
+                )
+                for target_id in range(targets)
+            ],
+        )
+        for goal_id in range(goals)
+    ]
+
+
+def public_goals_route() -> APIRoute:
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.path == "/goal/public":
+            return route
+    raise RuntimeError("GET /goal/public route not found")
+
+
+async def measure(render: Callable[[], Awaitable[bytes]], iterations: int) -> float:
+    await render()
+    start = time.process_time()
+    for _ in range(iterations):
+        await render()
+    return (time.process_time() - start) / iterations
+
+
+async def main(goals_count: int, targets_count: int, iterations: int) -> None:
+    goals = build_goals(goals_count, targets_count)
+    route = public_goals_route()
+
+    async def response_model_path() -> bytes:
+        content = AllGoalsSchemaResponse(goals=goals)
+        serialized = await serialize_response(field=route.response_field, response_content=content)
+        return JSONResponse(serialized).body
+
+    async def pre_serialized_path() -> bytes:
+        return goals_page_response(goals, None).body
+
+    assert (await response_model_path()).count(b'"id"') == (await pre_serialized_path()).count(
+        b'"id"'
+    )
+
+    before = await measure(response_model_path, iterations)
+    after = await measure(pre_serialized_path, iterations)
+    print(f"page: {goals_count} goals x {targets_count} targets, {iterations} iterations")
+    print(f"response_model: {before * 1000:8.3f} ms CPU/request")
+    print(f"pre-serialized: {after * 1000:8.3f} ms CPU/request")
+    print(f"saved:          {(before - after) * 1000:8.3f} ms ({(1 - after / before):.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--goals", type=int, default=100)
+    parser.add_argument("--targets", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.goals, args.targets, args.iterations))